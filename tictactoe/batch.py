@@ -0,0 +1,282 @@
+# Apply the symmetries of the tic-tac-toe board to many boards at once.
+
+# tictactoe03 reduces rotating and reflecting a board to executing a
+# precomputed permutation, but it still does so one board at a time, in a
+# Python loop. Here all 8 symmetries of a WIDTH x WIDTH board are stacked
+# into an (8, SIZE) array of indices. A whole (N, SIZE) batch of boards can
+# then be transformed with a single fancy-indexing call, giving an
+# (N, 8, SIZE) array, and finding the canonical form of every board in the
+# batch is an argmin over integer keys.
+
+# Boards are NumPy arrays of -1/0/1 in the same flat layout as the tuple
+# boards of tictactoe03, so either can be converted to the other with
+# np.array(boards) and tuple(row).
+
+# best_responses_batch answers a whole batch of best response queries from a
+# solved table indexed by rank (a ranking.DenseTable or tablefile.MappedTable).
+# Boards can be given as arrays, or already packed into their board keys,
+# which are the same numbers as their ranks. If the table only holds
+# canonical boards (e.g. from tictactoe03 with canonical=True), each board is
+# canonicalized first and its move mapped back with the same permutations.
+
+
+import numpy as np
+
+import ranking
+from benchmark import funtime
+import tictactoe03
+
+
+# (8, SIZE) index arrays, computed once per WIDTH by symmetry_perms.
+_perms = {}
+
+
+def symmetry_perms(WIDTH):
+    """Return the 8 symmetries of a WIDTH x WIDTH board as an (8, SIZE) array.
+
+    Row t is tictactoe03's symmetry_perms[t]: the tth symmetry of board has
+    board[perms[t, j]] in square j.
+    """
+    if WIDTH not in _perms:
+        game = tictactoe03.TicTacToe(WIDTH)
+        _perms[WIDTH] = np.array(game.symmetry_perms, dtype=np.intp)
+    return _perms[WIDTH]
+
+
+def width_of(boards):
+    "Return WIDTH for an (N, SIZE) array of boards."
+    WIDTH = int(round(boards.shape[-1] ** 0.5))
+    if WIDTH ** 2 != boards.shape[-1]:
+        raise ValueError("boards of size %d are not square" % boards.shape[-1])
+    return WIDTH
+
+
+def apply_symmetries(boards, perms=None):
+    """Return all symmetries of an (N, SIZE) array of boards.
+
+    The result has shape (N, len(perms), SIZE), and result[n, t] is
+    boards[n] transformed by perms[t].
+    perms defaults to all 8 symmetries of the board.
+    """
+    boards = np.asarray(boards)
+    if perms is None:
+        perms = symmetry_perms(width_of(boards))
+    return boards[:, perms]
+
+
+def board_keys(boards):
+    """Return an int key for each board in an (..., SIZE) array of boards.
+
+    Each board is read as a base 3 number, with square 0 as the most
+    significant digit, so comparing keys is the same as comparing the board
+    tuples lexicographically.
+    """
+    boards = np.asarray(boards)
+    SIZE = boards.shape[-1]
+    if SIZE > 39:
+        raise ValueError("boards of size %d do not fit in a 64-bit key" % SIZE)
+    powers = 3 ** np.arange(SIZE - 1, -1, -1, dtype=np.int64)
+    return (boards + 1).astype(np.int64).dot(powers)
+
+
+def canonical_keys(boards, perms=None):
+    """Return (keys, transform_ids) for an (N, SIZE) array of boards.
+
+    keys[n] is the board_key of the canonical form of boards[n], which is
+    the lexicographically smallest of its symmetries, and transform_ids[n]
+    is the index in perms of the symmetry that produces it.
+    This agrees with tictactoe03's canonicalize, board by board.
+    """
+    keys = board_keys(apply_symmetries(boards, perms))
+    # argmin picks the first transform on ties, just like min over (key, t).
+    transform_ids = keys.argmin(axis=1)
+    return keys[np.arange(len(keys)), transform_ids], transform_ids
+
+
+def canonicalize(boards, perms=None):
+    """Return (canonical_boards, transform_ids) for an (N, SIZE) array of boards.
+
+    canonical_boards is an (N, SIZE) array holding the canonical form of
+    each board, see canonical_keys.
+    """
+    syms = apply_symmetries(boards, perms)
+    transform_ids = board_keys(syms).argmin(axis=1)
+    return syms[np.arange(len(syms)), transform_ids], transform_ids
+
+
+def unrank(keys, SIZE):
+    "Return the (N, SIZE) array of boards with the given board keys."
+    powers = 3 ** np.arange(SIZE - 1, -1, -1, dtype=np.int64)
+    return (np.asarray(keys)[:, None] // powers % 3 - 1).astype(np.int8)
+
+
+def best_responses_batch(boards, table, canonical=False):
+    """Return arrays (moves, values) of best responses to a batch of boards.
+
+    boards is either an (N, SIZE) array of boards or an array of N board keys.
+    table is a ranking.DenseTable or tablefile.MappedTable. If canonical is
+    True, table only needs to hold the canonical form of each board.
+
+    moves[n] is -1 where there is nowhere left to go, and values[n] is
+    ranking.UNKNOWN where the board is not in the table.
+    """
+    boards = np.asarray(boards)
+    table_moves = np.frombuffer(table.moves, dtype=np.int8)
+    table_values = np.frombuffer(table.values, dtype=np.int8)
+
+    if not canonical:
+        keys = boards if boards.ndim == 1 else board_keys(boards)
+        return table_moves[keys], table_values[keys]
+
+    if boards.ndim == 1:
+        boards = unrank(boards, table.SIZE)
+    keys, transform_ids = canonical_keys(boards)
+    moves = table_moves[keys]
+    values = table_values[keys]
+
+    # A move on the canonical board is square perms[t, move] of the board.
+    perms = symmetry_perms(width_of(boards))
+    known = moves >= 0
+    moves[known] = perms[transform_ids[known], moves[known]]
+    return moves, values
+
+
+
+# Some sample tests, not very high coverage.
+class TestBatch():
+
+    def test(self):
+        print "\n---RUNNING TESTS---\n"
+
+        self.test_apply_symmetries()
+        self.test_board_keys()
+        self.test_canonicalize()
+        self.test_best_responses_batch()
+
+        print "\n---ALL TESTS PASS---\n"
+
+
+    def test_apply_symmetries(self):
+
+        game = tictactoe03.TicTacToe()
+
+        assert symmetry_perms(3).shape == (8, 9)
+
+        a = (1,1,1, 0,0,7, 0,0,0)
+        b = (1,2,3, 4,5,6, 7,8,9)
+        syms = apply_symmetries(np.array([a, b]))
+        assert syms.shape == (2, 8, 9)
+
+        assert [tuple(row) for row in syms[0]] == list(game.symmetries(a))
+        assert [tuple(row) for row in syms[1]] == list(game.symmetries(b))
+
+        print '\t* test_apply_symmetries passes'
+
+
+    def test_board_keys(self):
+
+        boards = [(1,0,-1, 0,0,0, 0,0,0), (-1,1,1, 1,1,1, 1,1,1),
+                  (0,0,0, 0,0,0, 0,0,0), (1,0,-1, 0,0,0, 0,0,1)]
+        keys = board_keys(np.array(boards))
+
+        # Sorting by key is the same as sorting the tuples.
+        assert [boards[n] for n in keys.argsort()] == sorted(boards)
+        assert board_keys(np.array((-1,) * 9)) == 0
+        assert board_keys(np.array((1,) * 9)) == 3 ** 9 - 1
+
+        print '\t* test_board_keys passes'
+
+
+    def test_canonicalize(self):
+
+        game = tictactoe03.TicTacToe()
+        game.build_best_responses()
+        boards = list(game.best_responses)
+
+        canonical, transform_ids = canonicalize(np.array(boards))
+        keys, transform_ids2 = canonical_keys(np.array(boards))
+        assert (transform_ids == transform_ids2).all()
+        assert (keys == board_keys(canonical)).all()
+
+        for board, canon, t in zip(boards, canonical, transform_ids):
+            assert game.canonicalize(board) == (tuple(canon), t)
+
+        # 765 classes of equivalent boards.
+        assert len(set(keys)) == 765
+
+        print '\t* test_canonicalize passes'
+
+
+    def test_best_responses_batch(self):
+
+        game = tictactoe03.TicTacToe()
+        game.build_best_responses()
+        boards = list(game.best_responses)
+
+        table = ranking.DenseTable(game.SIZE)
+        table.update(game.best_responses)
+
+        # As boards or as keys
+        keys = board_keys(np.array(boards))
+        assert (unrank(keys, game.SIZE) == np.array(boards)).all()
+        for queries in [np.array(boards), keys]:
+            moves, values = best_responses_batch(queries, table)
+            for board, move, value in zip(boards, moves, values):
+                assert table[ranking.rank(board)] == (
+                    None if move == -1 else move, value)
+
+        # A table of canonical boards only gives the same answers as
+        # tictactoe03's lookup.
+        game_c = tictactoe03.TicTacToe(canonical=True)
+        game_c.build_best_responses()
+        table_c = ranking.DenseTable(game_c.SIZE)
+        table_c.update(game_c.best_responses)
+        assert len(table_c) == 765
+
+        for queries in [np.array(boards), keys]:
+            moves, values = best_responses_batch(queries, table_c, canonical=True)
+            for board, move, value in zip(boards, moves, values):
+                assert game_c.lookup(board) == (
+                    None if move == -1 else move, value)
+
+        # Boards that are not in the table
+        moves, values = best_responses_batch(np.array([(1,) * 9]), table)
+        assert values[0] == ranking.UNKNOWN
+
+        print '\t* test_best_responses_batch passes'
+
+
+
+if __name__ == '__main__':
+
+    tests = TestBatch()
+    tests.test()
+
+    game = tictactoe03.TicTacToe(3)
+    game.build_best_responses()
+    boards = list(game.best_responses)
+
+    print "Timing canonicalize for all %d boards, one at a time..." % len(boards)
+    funtime(lambda: [game.canonicalize(board) for board in boards])
+
+    print "Timing canonicalize for all %d boards, as a batch..." % len(boards)
+    funtime(canonicalize, np.array(boards))
+
+    table = ranking.DenseTable(game.SIZE)
+    table.update(game.best_responses)
+    game_c = tictactoe03.TicTacToe(3, canonical=True)
+    game_c.build_best_responses()
+    table_c = ranking.DenseTable(game_c.SIZE)
+    table_c.update(game_c.best_responses)
+
+    boards = np.array(boards * 100)
+    keys = board_keys(boards)
+
+    print "Timing best_responses_batch for %d board keys..." % len(keys)
+    funtime(best_responses_batch, keys, table)
+
+    print "Timing best_responses_batch for %d boards..." % len(boards)
+    funtime(best_responses_batch, boards, table)
+
+    print "Timing best_responses_batch for %d boards, canonical table..." % len(boards)
+    funtime(best_responses_batch, boards, table_c, True)
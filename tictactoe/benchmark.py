@@ -0,0 +1,373 @@
+# Benchmarks for the tic-tac-toe solvers.
+
+# Each solver used to have its own funtime function, which timed a single
+# call with time.clock and printed one number. That is not much to go on
+# when comparing one version against another: one run is noisy, and it says
+# nothing about memory. Here every benchmark is repeated, after some untimed
+# warmup runs, and reported as percentiles of the times along with the peak
+# memory of the process. Each benchmark runs in a fresh process by default,
+# so that its peak memory is its own.
+
+# Usage:
+#     python benchmark.py [--widths 2,3] [--reps 10] [--warmup 1]
+#                         [--only NAME] [--json FILE] [--baseline FILE]
+
+# --json writes the results as JSON, and --baseline compares the median
+# times against an earlier --json file, to catch regressions.
+
+# funtime is still here, for the quick timings at the bottom of each solver.
+
+
+import json
+import multiprocessing
+import optparse
+import random
+import resource
+import sys
+from timeit import default_timer
+
+
+def measure(fun, reps=10, warmup=1, per=1, setup=None):
+    """Time fun, and return a dictionary of results.
+
+    fun is called warmup times untimed, then reps times timed.
+    If setup is given, fun(*setup()) is called instead, and setup is not timed.
+    If fun performs per operations, times are reported per operation.
+
+    The results are reps, warmup, per, and the min, mean, max and the 50th,
+    90th and 99th percentiles of the times in seconds, and peak_rss_kb.
+    """
+    times = []
+    for rep in range(warmup + reps):
+        args = setup() if setup is not None else ()
+        t0 = default_timer()
+        fun(*args)
+        t1 = default_timer()
+        if rep >= warmup:
+            times.append((t1 - t0) / per)
+
+    times.sort()
+    return {
+        'reps': reps,
+        'warmup': warmup,
+        'per': per,
+        'min': times[0],
+        'mean': sum(times) / len(times),
+        'p50': percentile(times, 50),
+        'p90': percentile(times, 90),
+        'p99': percentile(times, 99),
+        'max': times[-1],
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def percentile(sorted_times, p):
+    "Return the pth percentile of a sorted list, by the nearest-rank method."
+    k = max(0, -(-len(sorted_times) * p // 100) - 1)
+    return sorted_times[int(k)]
+
+
+def funtime(fun, *args):
+    "Time the execution of function fun"
+    print "Runtime: ", measure(fun, reps=1, warmup=0, setup=lambda: args)['p50']
+
+
+def format_time(t):
+    "Return a time in seconds as a short string with units."
+    for unit, scale in [('s', 1), ('ms', 1e-3), ('us', 1e-6)]:
+        if t >= scale:
+            return '%.3g %s' % (t / scale, unit)
+    return '%.3g ns' % (t / 1e-9)
+
+
+
+# The benchmarks. Each one takes (engine, WIDTH, reps, warmup) and returns
+# the results of measure. The modules are only imported when they are used.
+
+def sample_board(WIDTH, plies=None):
+    "Return a flat board after a few random but repeatable moves."
+    SIZE = WIDTH ** 2
+    if plies is None:
+        plies = SIZE // 2
+    board = [0] * SIZE
+    squares = range(SIZE)
+    random.Random(WIDTH).shuffle(squares)
+    for n, i in enumerate(squares[:plies]):
+        board[i] = 1 if n % 2 == 0 else -1
+    return tuple(board)
+
+
+def nested(board, WIDTH):
+    "Return a flat board as a tuple of rows, as in tictactoe02."
+    return tuple(board[i*WIDTH:(i+1)*WIDTH] for i in range(WIDTH))
+
+
+def bench_build_best_responses(engine, WIDTH, reps, warmup):
+    module = __import__(engine)
+    return measure(lambda game: game.build_best_responses(), reps, warmup,
+                   setup=lambda: (module.TicTacToe(WIDTH),))
+
+
+def bench_check_win(engine, WIDTH, reps, warmup):
+    game = __import__(engine).TicTacToe(WIDTH)
+    board = sample_board(WIDTH)
+    if engine == 'tictactoe02':
+        board = nested(board, WIDTH)
+    n = 1000
+    return measure(lambda: [game.check_win(board, 1) for _ in xrange(n)],
+                   reps, warmup, per=n)
+
+
+def bench_symmetries(engine, WIDTH, reps, warmup):
+    game = __import__(engine).TicTacToe(WIDTH)
+    board = sample_board(WIDTH)
+    if engine == 'tictactoe02':
+        board = nested(board, WIDTH)
+    n = 1000
+    return measure(lambda: [list(game.symmetries(board)) for _ in xrange(n)],
+                   reps, warmup, per=n)
+
+
+def bench_rotate(engine, WIDTH, reps, warmup):
+    return bench_transform(engine, WIDTH, reps, warmup, 'rotate')
+
+def bench_reflect(engine, WIDTH, reps, warmup):
+    return bench_transform(engine, WIDTH, reps, warmup, 'reflect')
+
+def bench_transform(engine, WIDTH, reps, warmup, name):
+    "Time rotate/reflect, or the raw versions if engine ends in _raw."
+    if engine.endswith('_raw'):
+        engine, name = engine[:-len('_raw')], name + '_raw'
+    game = __import__(engine).TicTacToe(WIDTH)
+    board = sample_board(WIDTH)
+    if engine == 'tictactoe02':
+        board = nested(board, WIDTH)
+    f = getattr(game, name)
+    n = 1000
+    return measure(lambda: [f(board) for _ in xrange(n)], reps, warmup, per=n)
+
+
+def bench_lookup(engine, WIDTH, reps, warmup):
+    """Time looking up the best response to every board in the table,
+    per board."""
+    import tictactoe01
+    game01 = tictactoe01.TicTacToe(WIDTH)
+    game01.build_best_responses()
+    boards = list(game01.best_responses)
+    n = len(boards)
+
+    if engine == 'tictactoe01':
+        table = game01.best_responses
+        return measure(lambda: [table[board] for board in boards],
+                       reps, warmup, per=n)
+
+    elif engine == 'tictactoe02':
+        import tictactoe02
+        game = tictactoe02.TicTacToe(WIDTH)
+        game.build_best_responses()
+        boards = [nested(board, WIDTH) for board in boards]
+        return measure(lambda: [game.get_best_response(board) for board in boards],
+                       reps, warmup, per=n)
+
+    elif engine == 'tictactoe02_rank':
+        import tictactoe02
+        game = tictactoe02.TicTacToe(WIDTH)
+        game.build_dense_table()
+        ranks = [game.rank(nested(board, WIDTH)) for board in boards]
+        return measure(lambda: [game.get_best_response_rank(r) for r in ranks],
+                       reps, warmup, per=n)
+
+    elif engine == 'tictactoe03_canonical':
+        import tictactoe03
+        game = tictactoe03.TicTacToe(WIDTH, canonical=True)
+        game.build_best_responses()
+        return measure(lambda: [game.lookup(board) for board in boards],
+                       reps, warmup, per=n)
+
+    elif engine == 'tictactoe04':
+        import tictactoe04
+        game = tictactoe04.TicTacToe(WIDTH)
+        game.build_best_responses()
+        table = game.best_responses
+        return measure(lambda: [table[board] for board in boards],
+                       reps, warmup, per=n)
+
+    elif engine == 'batch':
+        import numpy as np
+        import batch
+        import ranking
+        table = ranking.DenseTable(game01.SIZE)
+        table.update(game01.best_responses)
+        boards = np.array(boards)
+        return measure(lambda: batch.best_responses_batch(boards, table),
+                       reps, warmup, per=n)
+
+    raise ValueError("unknown engine %r" % engine)
+
+
+# name: (benchmark function, engines)
+BENCHMARKS = [
+    ('build_best_responses', bench_build_best_responses,
+     ['tictactoe01', 'tictactoe02', 'tictactoe03', 'tictactoe04', 'tictactoe05',
+      'tictactoe06']),
+    ('check_win', bench_check_win,
+     ['tictactoe01', 'tictactoe02', 'tictactoe03', 'tictactoe04', 'tictactoe05',
+      'tictactoe06']),
+    ('symmetries', bench_symmetries,
+     ['tictactoe02', 'tictactoe03']),
+    ('rotate', bench_rotate,
+     ['tictactoe02', 'tictactoe03_raw', 'tictactoe03']),
+    ('reflect', bench_reflect,
+     ['tictactoe02', 'tictactoe03_raw', 'tictactoe03']),
+    ('lookup', bench_lookup,
+     ['tictactoe01', 'tictactoe02', 'tictactoe02_rank', 'tictactoe03_canonical',
+      'tictactoe04', 'batch']),
+]
+
+
+def run_benchmark(spec):
+    "Run one benchmark, spec = (name, engine, WIDTH, reps, warmup)."
+    name, engine, WIDTH, reps, warmup = spec
+    fun = dict((name2, fun) for name2, fun, _ in BENCHMARKS)[name]
+    result = fun(engine, WIDTH, reps, warmup)
+    result.update(name=name, engine=engine, WIDTH=WIDTH)
+    return result
+
+
+def run_suite(widths=(2, 3), reps=10, warmup=1, only=None, isolate=True):
+    """Run all benchmarks (or only those named in only) for each WIDTH,
+    and return a list of their results.
+
+    If isolate is True, each benchmark runs in a new process.
+    """
+    specs = [(name, engine, WIDTH, reps, warmup)
+             for name, _, engines in BENCHMARKS
+             if only is None or name in only
+             for engine in engines
+             for WIDTH in widths]
+
+    results = []
+    for spec in specs:
+        if isolate:
+            pool = multiprocessing.Pool(1)
+            try:
+                result = pool.apply(run_benchmark, (spec,))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            result = run_benchmark(spec)
+        print_result(result)
+        results.append(result)
+    return results
+
+
+def print_result(result, baseline=None):
+    "Print one line of results, compared against a baseline result if given."
+    line = '%-22s %-24s %2d   p50 %-9s p90 %-9s p99 %-9s %8d kB' % (
+        result['name'], result['engine'], result['WIDTH'],
+        format_time(result['p50']), format_time(result['p90']),
+        format_time(result['p99']), result['peak_rss_kb'])
+    if baseline is not None:
+        line += '   %.2fx baseline' % (result['p50'] / baseline['p50'])
+    print line
+    sys.stdout.flush()
+
+
+def compare(results, baseline_results):
+    "Print results alongside the matching results of an earlier run."
+    baseline = dict(((r['name'], r['engine'], r['WIDTH']), r)
+                    for r in baseline_results)
+    print "\nCompared to baseline (p50):"
+    for result in results:
+        key = (result['name'], result['engine'], result['WIDTH'])
+        print_result(result, baseline.get(key))
+
+
+
+# Some sample tests, not very high coverage.
+class TestBenchmark():
+
+    def test(self):
+        print "\n---RUNNING TESTS---\n"
+
+        self.test_percentile()
+        self.test_measure()
+        self.test_run_benchmark()
+
+        print "\n---ALL TESTS PASS---\n"
+
+
+    def test_percentile(self):
+
+        times = range(1, 101)
+        assert percentile(times, 50) == 50
+        assert percentile(times, 90) == 90
+        assert percentile(times, 99) == 99
+        assert percentile(times, 100) == 100
+        assert percentile([7], 50) == 7
+
+        print '\t* test_percentile passes'
+
+
+    def test_measure(self):
+
+        calls = []
+        result = measure(lambda x: calls.append(x), reps=5, warmup=2,
+                         setup=lambda: (len(calls),))
+        assert calls == range(7)
+        assert result['reps'] == 5 and result['warmup'] == 2
+        assert result['min'] <= result['p50'] <= result['p90'] <= result['max']
+        assert result['peak_rss_kb'] > 0
+
+        print '\t* test_measure passes'
+
+
+    def test_run_benchmark(self):
+
+        for name, _, engines in BENCHMARKS:
+            for engine in engines:
+                result = run_benchmark((name, engine, 2, 1, 0))
+                assert result['name'] == name and result['engine'] == engine
+
+        # The results can be saved as JSON.
+        json.loads(json.dumps(result))
+
+        print '\t* test_run_benchmark passes'
+
+
+
+if __name__ == '__main__':
+
+    parser = optparse.OptionParser()
+    parser.add_option('--widths', default='2,3',
+                      help="comma separated WIDTHs to run [%default]")
+    parser.add_option('--reps', type='int', default=10,
+                      help="timed runs of each benchmark [%default]")
+    parser.add_option('--warmup', type='int', default=1,
+                      help="untimed runs before the timed ones [%default]")
+    parser.add_option('--only', action='append',
+                      help="run only this benchmark (can be repeated)")
+    parser.add_option('--json', help="write results as JSON to this file")
+    parser.add_option('--baseline', help="compare with results in this JSON file")
+    parser.add_option('--no-isolate', dest='isolate', action='store_false',
+                      default=True, help="run all benchmarks in this process")
+    parser.add_option('--test', action='store_true', help="run the tests")
+    options, args = parser.parse_args()
+
+    if options.test:
+        tests = TestBenchmark()
+        tests.test()
+        sys.exit()
+
+    widths = [int(w) for w in options.widths.split(',')]
+    results = run_suite(widths, options.reps, options.warmup, options.only,
+                        options.isolate)
+
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            compare(results, json.load(f))
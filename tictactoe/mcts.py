@@ -0,0 +1,382 @@
+# Play tic-tac-toe on boards too big to solve, by Monte Carlo tree search.
+
+# For WIDTH >= 5 there is no hope of building best_responses, and even
+# tictactoe04's solve can't prove the value of a board until it is nearly
+# full. Instead, MCTSPlayer estimates the value of each move by playing
+# lots of random games from it, and plays more of them below the moves
+# that look best so far (the UCT rule). The more games it has time for,
+# the better the estimates.
+
+# Random games are played many at a time, with NumPy. A random game from a
+# board is just a random order in which to fill its empty squares, with the
+# players taking turns. So a batch of games is filled in all at once, and
+# then the winner of each one is the owner of the first line to be
+# completed, by the time its last square was filled.
+
+# The tree of boards is kept between moves, so when the same game comes
+# back after the opponent's move, the games already played below that
+# board still count. And once few enough squares are left, there is no
+# need to guess: those boards are solved exactly by tictactoe04.solve, and
+# the solved value stands in for random games. Solved values are passed up
+# the tree as well: a board is solved when one of its moves is a proven win,
+# or when all of its moves have been solved.
+
+# Boards are flat tuples as in tictactoe03, whose check_win decides when a
+# game in the tree is over.
+
+
+import math
+from timeit import default_timer
+
+import numpy as np
+
+import tictactoe03
+import tictactoe04
+from benchmark import funtime
+
+
+
+class Node():
+    """A board in the search tree.
+
+    player is the player to move. total is the sum of the results of the
+    games played through this board, each +1/-1/0 for an X win/O win/draw,
+    and visits is how many there were. children maps a move to the Node
+    it leads to, and untried lists the moves that have no Node yet.
+    exact is the value of the board to X if it has been solved, else None.
+    """
+
+    def __init__(self, board, player, game):
+        self.board = board
+        self.player = player
+        self.visits = 0
+        self.total = 0.0
+        self.children = {}
+
+        outcome = game.check_win(board, player)
+        if outcome is not None:
+            self.exact = outcome * player
+            self.untried = []
+        else:
+            self.exact = None
+            self.untried = [i for i in range(len(board)) if board[i] == 0]
+
+    def child(self, move, game):
+        "Add and return the Node for move."
+        board2 = self.board[:move] + (self.player,) + self.board[move+1:]
+        node = Node(board2, -1 * self.player, game)
+        self.children[move] = node
+        self.untried.remove(move)
+        return node
+
+
+
+class MCTSPlayer():
+    """Chooses moves by Monte Carlo tree search with the UCT rule.
+
+    * batch_size random games are played each time a board is visited.
+    * c weighs trying less played moves against playing the best ones.
+    * Boards with at most exact_empties empty squares are solved exactly
+      by tictactoe04, instead of by random games.
+    * seed seeds the random games.
+
+    root is the Node of the last board searched. Its subtree is reused if
+    best_move is next asked about one of the boards that can follow it.
+    """
+
+    def __init__(self, WIDTH=3, batch_size=64, c=1.4, exact_empties=8, seed=None):
+        self.WIDTH = WIDTH
+        self.SIZE = WIDTH ** 2
+        self.batch_size = batch_size
+        self.c = c
+        self.exact_empties = exact_empties
+
+        self.game = tictactoe03.TicTacToe(WIDTH)
+        self.solver = tictactoe04.TicTacToe(WIDTH)
+        self.rng = np.random.RandomState(seed)
+
+        # Each row lists the squares of one row, column or diagonal, as in
+        # the solver's win masks.
+        self.lines = np.array([[i for i in range(self.SIZE) if mask >> i & 1]
+                               for mask in self.solver.win_masks])
+
+        self.root = None
+
+
+    def best_move(self, board, player=None, playouts=None, seconds=None):
+        """Return (move, value) for board, as in best_responses, where value
+        is the average result of the games played from board, between -1
+        and 1, or the exact value if board was solved.
+
+        The search stops after the given number of random games, or seconds,
+        whichever comes first. With neither, it plays 10000 games. Unless
+        board was searched before, at least one batch is played, even if
+        the budget is already used up, so that there is a move to return.
+        If player is None, it is inferred from the board assuming X went first.
+        """
+        board = tuple(board)
+        if player is None:
+            player = 1 if board.count(1) == board.count(-1) else -1
+        if playouts is None and seconds is None:
+            playouts = 10000
+
+        self.root = self.find_node(board, player)
+        root = self.root
+        if root.exact is None and len(root.untried) <= self.exact_empties:
+            self.solve(root)
+        if root.exact is not None:
+            move, value = self.solver.solve(board, player)
+            return (move, value)
+
+        start = default_timer()
+        played = 0
+        while (not root.children or
+               (playouts is None or played < playouts) and
+               (seconds is None or default_timer() - start < seconds)):
+            played += self.search(root)
+            if root.exact is not None:
+                break
+
+        if root.exact is not None:
+            # Solved in the tree: take a move that proves it.
+            for move, node in sorted(root.children.iteritems()):
+                if node.exact == root.exact:
+                    return (move, player * root.exact)
+
+        # The most played move is the one the search trusts most.
+        move, node = max(root.children.iteritems(), key=lambda item: item[1].visits)
+        return (move, player * node.total / node.visits)
+
+
+    def find_node(self, board, player):
+        """Return the Node for board from the last search, if it is the root
+        or one or two moves below it, or else a new Node."""
+        if self.root is not None:
+            nodes = [self.root]
+            for node in self.root.children.values():
+                nodes.append(node)
+                nodes.extend(node.children.values())
+            for node in nodes:
+                if node.board == board and node.player == player:
+                    return node
+        return Node(board, player, self.game)
+
+
+    def search(self, root):
+        """Play one batch of games down the tree from root, and add their
+        results to every Node they went through.
+
+        Returns the number of games played.
+        """
+        # Selection: follow the UCT rule down to a board with moves left to try.
+        path = [root]
+        node = root
+        while node.exact is None and not node.untried:
+            node = self.select(node)
+            path.append(node)
+
+        # Expansion
+        if node.exact is None:
+            move = node.untried[self.rng.randint(len(node.untried))]
+            node = node.child(move, self.game)
+            path.append(node)
+            if node.exact is None and len(node.untried) <= self.exact_empties:
+                self.solve(node)
+
+        # Simulation
+        n = self.batch_size
+        if node.exact is not None:
+            total = n * node.exact
+        else:
+            total = float(self.playouts(node.board, node.player, n).sum())
+
+        # Backpropagation
+        for node in path:
+            node.visits += n
+            node.total += total
+        for node in reversed(path[:-1]):
+            if node.exact is not None or not self.update_exact(node):
+                break
+        return n
+
+
+    def update_exact(self, node):
+        """Set node.exact if the values of its children prove it.
+        Returns True if node is solved.
+        """
+        values = [node.player * child.exact for child in node.children.itervalues()
+                  if child.exact is not None]
+        if 1 in values:
+            node.exact = node.player
+        elif not node.untried and len(values) == len(node.children):
+            node.exact = node.player * max(values)
+        return node.exact is not None
+
+
+    def select(self, node):
+        "Return the child of node with the best UCT score for node.player."
+        log_visits = math.log(node.visits)
+        best_score = None
+        for child in node.children.itervalues():
+            if child.exact is not None:
+                mean = node.player * child.exact
+            else:
+                mean = node.player * child.total / child.visits
+            score = mean + self.c * math.sqrt(log_visits / child.visits)
+            if best_score is None or score > best_score:
+                best_score, best = score, child
+        return best
+
+
+    def solve(self, node):
+        "Set node.exact with tictactoe04."
+        node.exact = node.player * self.solver.solve(node.board, node.player)[1]
+
+
+    def playouts(self, board, player, n):
+        """Play n random games from board, with player to move, and return
+        an array of their results, +1/-1/0 for an X win/O win/draw.
+
+        board must not be a finished game.
+        """
+        board = np.array(board, dtype=np.int8)
+        empty = np.flatnonzero(board == 0)
+
+        # order[g, k] is the kth empty square to be filled in game g.
+        order = empty[np.argsort(self.rng.rand(n, len(empty)), axis=1)]
+        rows = np.arange(n)[:, None]
+
+        boards = np.tile(board, (n, 1))
+        # The turn on which each square was filled, -1 if it already was.
+        turns = np.full((n, self.SIZE), -1, dtype=np.int16)
+        turns[rows, order] = np.arange(len(empty))
+        pieces = np.where(np.arange(len(empty)) % 2 == 0, player, -player)
+        boards[rows, order] = pieces
+
+        # A line is won when its last square is filled, if all are the same.
+        sums = boards[:, self.lines].sum(axis=2)
+        won = abs(sums) == self.WIDTH
+        finished = np.where(won, turns[:, self.lines].max(axis=2), self.SIZE)
+        first = finished.argmin(axis=1)
+        results = np.sign(sums[rows[:, 0], first])
+        results[~won[rows[:, 0], first]] = 0
+        return results
+
+
+
+# Some sample tests, not very high coverage.
+class TestMCTS():
+
+    def test(self):
+        print "\n---RUNNING TESTS---\n"
+
+        self.test_playouts()
+        self.test_best_move()
+        self.test_exact()
+        self.test_reuse()
+
+        print "\n---ALL TESTS PASS---\n"
+
+
+    def test_playouts(self):
+
+        player = MCTSPlayer(seed=0)
+
+        # Only one square left, where X wins.
+        results = player.playouts((1,-1,1, -1,-1,1, 1,1,0), 1, 10)
+        assert list(results) == [1] * 10
+
+        # O wins on the first move, whatever X does later.
+        results = player.playouts((-1,-1,0, 1,1,0, 1,0,0), -1, 100)
+        assert (results == -1).mean() > 0.3
+        assert (results == 1).any()
+
+        # In random games from the empty board, X wins 58.5%, O 28.8%,
+        # and 12.7% are draws.
+        results = player.playouts((0,) * 9, 1, 20000)
+        assert abs((results == 1).mean() - 0.585) < 0.02
+        assert abs((results == -1).mean() - 0.288) < 0.02
+        assert abs((results == 0).mean() - 0.127) < 0.02
+
+        print '\t* test_playouts passes'
+
+
+    def test_best_move(self):
+
+        player = MCTSPlayer(exact_empties=0, seed=0)
+
+        # Win now
+        assert player.best_move((1,1,0, -1,-1,0, 0,0,0), playouts=5000)[0] == 2
+        # Block
+        assert player.best_move((1,0,0, -1,-1,0, 1,0,0), playouts=5000)[0] == 5
+
+        # No budget at all still gives a move.
+        player = MCTSPlayer(4, seed=0)
+        for budget in [{'playouts': 0}, {'seconds': 0}, {'seconds': -1}]:
+            player.root = None
+            move, value = player.best_move((0,) * 16, **budget)
+            assert 0 <= move < 16 and -1 <= value <= 1
+            assert player.root.visits == player.batch_size
+
+        # A bigger board, on a time budget
+        player = MCTSPlayer(5, seed=0)
+        board = (0,) * 25
+        move, value = player.best_move(board, seconds=0.2)
+        assert board[move] == 0 and -1 <= value <= 1
+
+        print '\t* test_best_move passes'
+
+
+    def test_exact(self):
+
+        player = MCTSPlayer(seed=0)
+        game = tictactoe04.TicTacToe()
+        game.build_best_responses()
+
+        # Small enough to solve, so the value is exact.
+        board = (1,0,0, 0,-1,0, 0,0,0)
+        assert player.best_move(board)[1] == game.best_responses[board][1]
+
+        # The search stops as soon as the root is solved.
+        player = MCTSPlayer(exact_empties=7, seed=0)
+        move, value = player.best_move((0,0,0, 0,1,0, 0,0,0), playouts=10**6)
+        assert value == 0
+        assert player.root.exact == 0
+
+        print '\t* test_exact passes'
+
+
+    def test_reuse(self):
+
+        player = MCTSPlayer(4, exact_empties=0, seed=0)
+        board = (0,) * 16
+        move, value = player.best_move(board, playouts=3000)
+
+        # After our move and the opponent's, the games below are kept.
+        board = board[:move] + (1,) + board[move+1:]
+        reply = max(player.root.children[move].children.iteritems(),
+                    key=lambda item: item[1].visits)[0]
+        board = board[:reply] + (-1,) + board[reply+1:]
+        node = player.find_node(board, 1)
+        assert node.visits > 0
+        visits = node.visits
+        player.best_move(board, playouts=640)
+        assert player.root is node
+        assert node.visits == visits + 640
+
+        print '\t* test_reuse passes'
+
+
+
+if __name__ == '__main__':
+
+    tests = TestMCTS()
+    tests.test()
+
+    for WIDTH in [3, 5, 7]:
+        player = MCTSPlayer(WIDTH, batch_size=256, seed=0)
+        board = (0,) * player.SIZE
+        print "Timing of 100000 random games from the empty board, WIDTH = %d..." % WIDTH
+        funtime(lambda: [player.playouts(board, 1, 256) for _ in range(400)])
+
+        print "\n"
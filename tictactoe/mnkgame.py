@@ -0,0 +1,387 @@
+# Find the best response to any board configuration of an m,n,k-game.
+
+# Tic-tac-toe is the 3,3,3-game: a board of 3 rows and 3 columns, where the
+# first player to get 3 in a row wins. The solvers so far all assume a square
+# board where a win means filling a whole row, column or main diagonal.
+# Here the board has any number of rows and columns, and a win is any k
+# squares in a row, horizontally, vertically or diagonally. Optionally, there
+# is gravity: a piece can only go in the lowest empty square of a column,
+# as in connect four (the 7,6,4-game with gravity).
+
+# Everything that depends on the shape of the board is computed once, up
+# front, from (rows, cols, k):
+#     * lines: every set of k squares in a row. check_win looks at all of
+#       them, but the solver only looks at the lines through the square
+#       that was just filled.
+#     * symmetry_perms: the symmetries of the board. A square board has 8,
+#       as in tictactoe03. A rectangle can only be flipped, for 4. With
+#       gravity, the board can only be mirrored left to right, for 2.
+# The solver is memoized like tictactoe03 with canonical=True: it only stores
+# the canonical form of each board, and lookup maps moves back.
+
+
+import permgroup
+from benchmark import funtime
+
+
+
+class MNKGame():
+    """Implements the basic components of an m,n,k-game solver.
+
+    Boards are flat tuples of rows*cols squares, where square i is in row
+    i // cols and column i % cols, and row 0 is the top of the board.
+    1, -1, and 0 represent an X, an O, and unfilled square respectively.
+
+    best_responses is a dictionary where:
+        * each key is the canonical form of a board (see canonicalize) whose
+          game is not over yet.
+        * each value is a tuple, (move, value), where:
+            * move = i means player goes in ith square of the canonical board.
+            * value: the value of that move to the player who makes it.
+                value = +1/-1/0 for a win/loss/draw, respectively.
+
+    Use lookup to get the (move, value) for any board, including finished
+    games, where move is None. As usual, X always goes first, so whose turn
+    it is follows from the board, and best_responses only holds answers for
+    that player.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3, gravity=False):
+        self.ROWS = rows
+        self.COLS = cols
+        self.K = k
+        self.SIZE = rows * cols
+        self.gravity = gravity
+
+        self.lines = self.build_lines()
+        # lines_through[i] lists the lines that contain square i
+        self.lines_through = [[line for line in self.lines if i in line]
+                              for i in range(self.SIZE)]
+        self.symmetry_perms = self.build_symmetry_perms()
+
+        # Squares of each column, from the bottom up, for gravity
+        self.columns = [[r*cols + c for r in reversed(range(rows))]
+                        for c in range(cols)]
+
+        self.best_responses = {}
+
+
+    def build_lines(self):
+        "Return a list of tuples of squares, one for each k in a row."
+        lines = []
+        for r in range(self.ROWS):
+            for c in range(self.COLS):
+                for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    r2 = r + (self.K - 1) * dr
+                    c2 = c + (self.K - 1) * dc
+                    if 0 <= r2 < self.ROWS and 0 <= c2 < self.COLS:
+                        lines.append(tuple((r + n*dr) * self.COLS + c + n*dc
+                                           for n in range(self.K)))
+        return lines
+
+
+    def build_symmetry_perms(self):
+        """Return the symmetries of the board as permutations.
+
+        The tth symmetry of board has board[perm[j]] in square j, where
+        perm = symmetry_perms[t]. The identity is always first.
+        """
+        # The group is generated by mirroring left to right, plus, without
+        # gravity, flipping top to bottom, plus, for a square board, the
+        # transpose.
+        R, C = self.ROWS - 1, self.COLS - 1
+        maps = [lambda r, c: (r, C - c)]
+        if not self.gravity:
+            maps.append(lambda r, c: (R - r, c))
+            if self.ROWS == self.COLS:
+                maps.append(lambda r, c: (c, r))
+
+        generators = []
+        for f in maps:
+            perm = [0] * self.SIZE
+            for i in range(self.SIZE):
+                r, c = f(*divmod(i, self.COLS))
+                perm[r * self.COLS + c] = i
+            generators.append(tuple(perm))
+        return permgroup.closure(generators)
+
+
+    def legal_moves(self, board):
+        "Return the squares where the next piece may go."
+        if not self.gravity:
+            return [i for i in range(self.SIZE) if board[i] == 0]
+        moves = []
+        for column in self.columns:
+            for i in column:
+                if board[i] == 0:
+                    moves.append(i)
+                    break
+        return moves
+
+
+    def build_best_responses(self, board=None, player=None):
+        """Recursively compute best responses for all subgames of current board.
+
+        Call with no arguments to build the entire best_responses dict.
+
+        player = 1 for X, -1 for O. This is the current player, i.e. the one
+        who gets the next move. If player is None, it is inferred from the
+        board, and otherwise it must agree with it (see next_player).
+        """
+
+        # Initialize
+        if board is None:
+            board = (0,) * self.SIZE
+        player = self.check_player(board, player)
+
+        if self.check_win(board, player) is None:
+            self.solve(tuple(board), player)
+
+
+    def solve(self, board, player):
+        """Add the canonical form of board, and of every unfinished board that
+        could follow it, to best_responses.
+
+        Returns the value of board to player. The game must not be over.
+        """
+        board = self.canonicalize(board)[0]
+        if board in self.best_responses:
+            return self.best_responses[board][1]
+
+        best_value = -2
+        for i in self.legal_moves(board):
+            board2 = board[:i] + (player,) + board[i+1:]
+            if self.move_wins(board2, i, player):
+                value = 1
+            elif 0 not in board2:
+                value = 0 # draw
+            else:
+                value = -1 * self.solve(board2, -1 * player)
+            if value > best_value:
+                best_value, best_move = value, i
+
+        self.best_responses[board] = (best_move, best_value)
+        return best_value
+
+
+    def move_wins(self, board, i, player):
+        "Return True if player, having just moved to square i, has won."
+        for line in self.lines_through[i]:
+            for j in line:
+                if board[j] != player:
+                    break
+            else:
+                return True
+        return False
+
+
+    def check_win(self, board, player):
+        """Evaluate the current board to determine if there is a winner.
+
+        Returns 1 if player wins, 0 if draw, -1 if loses, and None if no winner
+        is yet determined.
+        """
+        for line in self.lines:
+            first = board[line[0]]
+            if first != 0 and all(board[j] == first for j in line):
+                return first * player
+
+        if 0 not in board:
+            return 0 # draw
+        else: return None # game not over yet
+
+
+    def next_player(self, board):
+        "Return the player to move on board, assuming X went first."
+        return 1 if board.count(1) == board.count(-1) else -1
+
+
+    def check_player(self, board, player):
+        """Return player, or next_player(board) if player is None.
+
+        Raises ValueError if player is not the one to move on board, since
+        best_responses has no answers for them.
+        """
+        if player is None:
+            return self.next_player(board)
+        if player != self.next_player(board):
+            raise ValueError("it is not player %d's turn on board %r"
+                             % (player, board))
+        return player
+
+
+    def canonicalize(self, board):
+        """Return (key, transform_id) where key is the canonical form of board,
+        the smallest of its symmetries, given by symmetry_perms[transform_id].
+        """
+        return min((tuple([board[j] for j in perm]), t)
+                   for t, perm in enumerate(self.symmetry_perms))
+
+
+    def lookup(self, board, player=None):
+        """Return the best response (move, value) to board.
+
+        If player is None, it is inferred from the board assuming X went
+        first. Otherwise it must be the player to move, or ValueError is raised.
+        """
+        player = self.check_player(board, player)
+
+        outcome = self.check_win(board, player)
+        if outcome is not None:
+            return (None, outcome)
+
+        key, transform_id = self.canonicalize(board)
+        if key not in self.best_responses:
+            self.solve(key, player)
+        move, value = self.best_responses[key]
+        return (self.symmetry_perms[transform_id][move], value)
+
+
+
+# Some sample tests, not very high coverage.
+class TestMNKGame():
+
+    def test(self):
+        print "\n---RUNNING TESTS---\n"
+
+        self.test_lines()
+        self.test_symmetries()
+        self.test_check_win()
+        self.test_matches_tictactoe()
+        self.test_gravity()
+
+        print "\n---ALL TESTS PASS---\n"
+
+
+    def test_lines(self):
+
+        assert len(MNKGame(3, 3, 3).lines) == 8
+        assert len(MNKGame(5, 5, 4).lines) == 28
+        # Connect four
+        assert len(MNKGame(6, 7, 4, gravity=True).lines) == 69
+
+        game = MNKGame(3, 4, 3)
+        assert (0, 1, 2) in game.lines and (1, 2, 3) in game.lines
+        assert (0, 4, 8) in game.lines and (0, 5, 10) in game.lines
+        assert (3, 6, 9) in game.lines
+        assert len(game.lines_through[5]) == 5
+
+        print '\t* test_lines passes'
+
+
+    def test_symmetries(self):
+
+        assert len(MNKGame(3, 3, 3).symmetry_perms) == 8
+        assert len(MNKGame(3, 4, 3).symmetry_perms) == 4
+        assert len(MNKGame(6, 7, 4, gravity=True).symmetry_perms) == 2
+
+        # Same symmetries as tictactoe03
+        import tictactoe03
+        game = MNKGame(3, 3, 3)
+        b = (1,2,3, 4,5,6, 7,8,9)
+        assert (set(tuple(b[j] for j in perm) for perm in game.symmetry_perms) ==
+                set(tictactoe03.TicTacToe().symmetries(b)))
+
+        game = MNKGame(2, 3, 2)
+        b = (1,2,3, 4,5,6)
+        assert (set(tuple(b[j] for j in perm) for perm in game.symmetry_perms) ==
+                set([(1,2,3, 4,5,6), (3,2,1, 6,5,4), (4,5,6, 1,2,3), (6,5,4, 3,2,1)]))
+
+        print '\t* test_symmetries passes'
+
+
+    def test_check_win(self):
+
+        game = MNKGame(3, 3, 3)
+
+        assert game.check_win((0,0,0, 0,0,0, 0,0,0), -1) is None
+        assert game.check_win((1,1,-1, 0,0,0, 0,0,0), -1) is None
+        assert game.check_win((1,-1,-1, 0,1,0, 0,0,1), -1) == -1
+        assert game.check_win((1,1,-1, 1,0,-1, 0,0,-1), 1) == -1
+        assert game.check_win((1,1,1, -1,0,-1, 0,0,-1), 1) == 1
+        assert game.check_win((1,1,-1, -1,-1,1, 1,1,-1), 1) == 0
+
+        game = MNKGame(4, 4, 3)
+        assert game.check_win((0,0,0,0, 0,1,0,0, 0,0,1,0, 0,0,0,1), -1) == -1
+        assert game.check_win((0,0,0,0, 0,1,0,0, 0,0,0,0, 0,0,0,1), -1) is None
+
+        print '\t* test_check_win passes'
+
+
+    def test_matches_tictactoe(self):
+
+        import tictactoe01
+
+        game01 = tictactoe01.TicTacToe()
+        game01.build_best_responses()
+
+        game = MNKGame(3, 3, 3)
+        game.build_best_responses()
+
+        for board, (move, value) in game01.best_responses.iteritems():
+            move2, value2 = game.lookup(board)
+            assert value2 == value
+            if move is None:
+                assert move2 is None
+            else:
+                player = 1 if board.count(1) == board.count(-1) else -1
+                board2 = board[:move2] + (player,) + board[move2+1:]
+                assert board[move2] == 0
+                assert -game01.best_responses[board2][1] == value
+
+        # An explicit player must be the one to move, and leaves the table
+        # as it was.
+        game = MNKGame(3, 3, 3)
+        board = (1,1,0, 0,-1,0, 0,0,0)
+        assert game.lookup(board, -1) == game.lookup(board)
+        try:
+            game.lookup(board, 1)
+            assert False
+        except ValueError:
+            pass
+        assert game.lookup(board) == game01.best_responses[board]
+
+        print '\t* test_matches_tictactoe passes'
+
+
+    def test_gravity(self):
+
+        def minimax(game, board, player):
+            "Plain minimax, no memo, no symmetries."
+            best_value = -2
+            for i in game.legal_moves(board):
+                board2 = board[:i] + (player,) + board[i+1:]
+                value = game.check_win(board2, player)
+                if value is None:
+                    value = -minimax(game, board2, -player)
+                best_value = max(best_value, value)
+            return best_value
+
+        game = MNKGame(3, 4, 3, gravity=True)
+        assert game.legal_moves((0,) * 12) == [8, 9, 10, 11]
+        assert game.legal_moves((0,0,0,0, 0,0,0,0, 1,0,0,0)) == [4, 9, 10, 11]
+
+        board = (0,0,0,0, 0,0,-1,0, 1,-1,1,0)
+        assert game.lookup(board)[1] == minimax(game, board, 1)
+
+        game = MNKGame(3, 3, 3, gravity=True)
+        game.build_best_responses()
+        assert game.lookup((0,) * 9)[1] == minimax(game, (0,) * 9, 1)
+
+        print '\t* test_gravity passes'
+
+
+
+if __name__ == '__main__':
+
+    tests = TestMNKGame()
+    tests.test()
+
+    for rows, cols, k, gravity in [(3, 3, 3, False), (3, 4, 3, False),
+                                   (4, 4, 3, True)]:
+        print "Timing for %d,%d,%d-game%s..." % (
+            rows, cols, k, " with gravity" if gravity else "")
+        game = MNKGame(rows, cols, k, gravity)
+        funtime(game.build_best_responses)
+        print "Size of best_responses:", len(game.best_responses)
+        print "Value:", game.lookup((0,) * game.SIZE)[1]
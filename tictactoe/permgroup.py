@@ -0,0 +1,202 @@
+# Groups of permutations, such as the symmetries of a board.
+
+# tictactoe03 gets at the 8 symmetries of a board by rotating it up to three
+# times and reflecting each rotation, which is 7 permutations applied one
+# after another. But every symmetry is itself a single permutation of the
+# squares. Given a few generators, like one rotation and one reflection,
+# closure multiplies them together until nothing new turns up, and that is
+# every element of the group, each as one direct permutation.
+
+# Nothing here knows about tic-tac-toe, so other boards with other symmetry
+# groups (see mnkgame.py) can use it too.
+
+# A permutation p is a tuple of indices, in the same form as the
+# symmetry_perms of tictactoe03: applying p to board gives the board with
+# board[p[j]] in square j.
+
+
+import operator
+
+
+def identity(n):
+    "Return the identity permutation of n elements."
+    return tuple(range(n))
+
+
+def apply_perm(board, p):
+    "Return board permuted by p, as a tuple."
+    return tuple([board[i] for i in p])
+
+
+def compose(p, q):
+    """Return the permutation that applies p and then q, i.e.
+    apply_perm(board, compose(p, q)) == apply_perm(apply_perm(board, p), q).
+    """
+    return tuple([p[i] for i in q])
+
+
+def invert(p):
+    "Return the permutation that undoes p."
+    inverse = [0] * len(p)
+    for j, i in enumerate(p):
+        inverse[i] = j
+    return tuple(inverse)
+
+
+def closure(generators):
+    """Return a list of all the permutations that can be made by composing
+    generators, with the identity first.
+    """
+    generators = [tuple(g) for g in generators]
+    elements = [identity(len(generators[0]))]
+    seen = set(elements)
+    # Each new element times each generator, until nothing new turns up.
+    for p in elements:
+        for g in generators:
+            q = compose(p, g)
+            if q not in seen:
+                seen.add(q)
+                elements.append(q)
+    return elements
+
+
+def perm_getter(source):
+    """Return a function that maps board to tuple(board[i] for i in source),
+    built once with operator.itemgetter.
+    """
+    if len(source) == 1:
+        # itemgetter with a single index returns the item, not a tuple.
+        i = source[0]
+        return lambda board: (board[i],)
+    return operator.itemgetter(*source)
+
+
+class PermGroup():
+    """The group of permutations generated by generators.
+
+    * elements[t] is the tth permutation of the group. elements[0] is the
+      identity.
+    * inverses[t] is the index of the inverse of elements[t]. If key is
+      elements[t] applied to board, elements[t][i] is the square of board
+      that square i of key came from, and elements[inverses[t]][j] is the
+      square of key that square j of board went to.
+    * getters[t] is elements[t] compiled with perm_getter.
+
+    The elements come in the order closure finds them, unless order is
+    given, a list of all the elements of the group in the order to keep
+    them, with the identity first.
+    """
+
+    def __init__(self, generators, order=None):
+        self.elements = closure(generators)
+        if order is not None:
+            order = [tuple(p) for p in order]
+            if (len(order) != len(self.elements) or
+                set(order) != set(self.elements) or
+                order[0] != self.elements[0]):
+                raise ValueError("order must list the whole group, "
+                                 "identity first")
+            self.elements = order
+        index = dict((p, t) for t, p in enumerate(self.elements))
+        self.inverses = [index[invert(p)] for p in self.elements]
+        self.getters = [perm_getter(p) for p in self.elements]
+
+    def __len__(self):
+        return len(self.elements)
+
+    def orbit(self, board):
+        "Yield board permuted by each element of the group, in order."
+        for getter in self.getters:
+            yield getter(board)
+
+
+
+# Some sample tests, not very high coverage.
+class TestPermGroup():
+
+    def test(self):
+        print "\n---RUNNING TESTS---\n"
+
+        self.test_compose()
+        self.test_closure()
+        self.test_perm_group()
+
+        print "\n---ALL TESTS PASS---\n"
+
+
+    def test_compose(self):
+
+        board = 'abcdef'
+        p = (1, 2, 0, 3, 5, 4)
+        q = (5, 4, 3, 2, 1, 0)
+
+        assert apply_perm(board, p) == tuple('bcadfe')
+        assert (apply_perm(board, compose(p, q)) ==
+                apply_perm(apply_perm(board, p), q))
+        assert compose(p, invert(p)) == identity(6)
+        assert compose(invert(p), p) == identity(6)
+        assert perm_getter(q)(board) == tuple('fedcba')
+        assert perm_getter((0,))('a') == ('a',)
+
+        print '\t* test_compose passes'
+
+
+    def test_closure(self):
+
+        # Rotation and reflection of a 3x3 board
+        rotation = (6,3,0, 7,4,1, 8,5,2)
+        reflection = (6,7,8, 3,4,5, 0,1,2)
+
+        assert len(closure([rotation])) == 4
+        assert len(closure([reflection])) == 2
+        elements = closure([rotation, reflection])
+        assert len(elements) == 8
+        assert elements[0] == identity(9)
+        assert len(set(elements)) == 8
+
+        # Closed under composition
+        for p in elements:
+            for q in elements:
+                assert compose(p, q) in elements
+
+        print '\t* test_closure passes'
+
+
+    def test_perm_group(self):
+
+        group = PermGroup([(6,3,0, 7,4,1, 8,5,2), (6,7,8, 3,4,5, 0,1,2)])
+        assert len(group) == 8
+
+        board = (1,0,0, 0,-1,0, 0,0,0)
+        for t, p in enumerate(group.elements):
+            key = group.getters[t](board)
+            assert key == apply_perm(board, p)
+            assert apply_perm(key, group.elements[group.inverses[t]]) == board
+            # A move on key maps back onto board, and the other way.
+            for i in range(9):
+                assert key[i] == board[p[i]]
+                assert board[i] == key[group.elements[group.inverses[t]][i]]
+
+        assert len(set(group.orbit(board))) == 4
+
+        # The same group, in another order
+        order = list(reversed(group.elements[1:]))
+        group2 = PermGroup([(6,3,0, 7,4,1, 8,5,2), (6,7,8, 3,4,5, 0,1,2)],
+                           [identity(9)] + order)
+        assert group2.elements[1:] == order
+        for t, p in enumerate(group2.elements):
+            assert compose(p, group2.elements[group2.inverses[t]]) == identity(9)
+        try:
+            PermGroup([(6,3,0, 7,4,1, 8,5,2)], group.elements)
+            assert False
+        except ValueError:
+            pass
+
+        print '\t* test_perm_group passes'
+
+
+
+if __name__ == '__main__':
+
+    tests = TestPermGroup()
+    tests.test()
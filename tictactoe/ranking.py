@@ -0,0 +1,234 @@
+# A dense index for tic-tac-toe boards.
+
+# The best_responses dictionaries of the solvers are keyed by board tuples.
+# Each key costs a tuple object (over 100 bytes for SIZE = 9), and every
+# lookup hashes all SIZE squares in Python. But a board is just SIZE digits,
+# each one of -1, 0 or 1, so it can be read as a base 3 number. That number
+# is its rank, and every board has a distinct rank in range(3 ** SIZE).
+
+# With ranks, a table of best responses can be held in two flat arrays of
+# bytes, one for moves and one for values, and looked up by indexing.
+# Not every rank is a reachable board, but for SIZE = 9 the whole table is
+# under 40 kB anyway.
+
+# Square 0 is the most significant digit, so sorting boards by rank is the
+# same as sorting the tuples. These are the same keys that batch.board_keys
+# computes for arrays of boards.
+
+# A MoveValueTable goes one step further than best responses, and holds the
+# value of every move from every board. There are only three values a move
+# can have, so with 2 bits per square the whole vector of a board packs into
+# one int, and the table is a single flat array of them.
+
+
+from array import array
+
+from benchmark import funtime
+
+
+# Stored in DenseTable.values for boards that are not in the table
+UNKNOWN = -2
+
+
+def rank(board):
+    "Return the rank of board, an iterable of -1/0/1 squares."
+    r = 0
+    for val in board:
+        r = 3 * r + val + 1
+    return r
+
+
+def unrank(r, SIZE):
+    "Return the flat board tuple of size SIZE with rank r."
+    board = [0] * SIZE
+    for i in range(SIZE - 1, -1, -1):
+        r, digit = divmod(r, 3)
+        board[i] = digit - 1
+    return tuple(board)
+
+
+class DenseTable():
+    """A table of best responses, indexed by the rank of the board.
+
+    moves[r] and values[r] hold the (move, value) for the board with rank r,
+    where move is the flat index of a square, or -1 in place of None.
+    values[r] is UNKNOWN for boards that have not been added.
+    """
+
+    def __init__(self, SIZE):
+        self.SIZE = SIZE
+        self.moves = array('b', [-1]) * 3 ** SIZE
+        self.values = array('b', [UNKNOWN]) * 3 ** SIZE
+
+    def add(self, r, move, value):
+        "Store (move, value) for the board with rank r."
+        self.moves[r] = -1 if move is None else move
+        self.values[r] = value
+
+    def update(self, best_responses):
+        "Add every entry of a best_responses dict keyed by flat board tuples."
+        for board, (move, value) in best_responses.iteritems():
+            self.add(rank(board), move, value)
+
+    def __getitem__(self, r):
+        "Return (move, value) for the board with rank r."
+        value = self.values[r]
+        if value == UNKNOWN:
+            raise KeyError(r)
+        move = self.moves[r]
+        return (None if move == -1 else move, value)
+
+    def __contains__(self, r):
+        return self.values[r] != UNKNOWN
+
+    def __len__(self):
+        return len(self.values) - self.values.count(UNKNOWN)
+
+
+class MoveValueTable():
+    """A table of the values of all moves, indexed by the rank of the board.
+
+    vectors[r] packs 2 bits for each square i of the board with rank r, at
+    bits 2*i and 2*i + 1: 0 if i is not a legal move, or else value + 2,
+    where value = +1/-1/0 is the value of moving to i for the player who
+    moves. Bit 2*SIZE is set once the board has been added, so that a
+    finished game, which has no legal moves, is not mistaken for a board
+    that was never added.
+    """
+
+    def __init__(self, SIZE):
+        self.SIZE = SIZE
+        self.KNOWN = 1 << 2 * SIZE
+        self.vectors = array('L', [0]) * 3 ** SIZE
+
+    def add(self, r, packed):
+        "Store the packed vector (see pack) for the board with rank r."
+        self.vectors[r] = packed | self.KNOWN
+
+    def pack(self, values):
+        """Return a list of SIZE values, with None for squares that are not
+        legal moves, packed into an int."""
+        packed = 0
+        for i, value in enumerate(values):
+            if value is not None:
+                packed |= (value + 2) << 2 * i
+        return packed
+
+    def __getitem__(self, r):
+        """Return a list of the values of moving to each square from the board
+        with rank r, with None for squares that are not legal moves."""
+        packed = int(self.vectors[r])
+        if not packed:
+            raise KeyError(r)
+        values = []
+        for i in range(self.SIZE):
+            field = packed >> 2 * i & 3
+            values.append(field - 2 if field else None)
+        return values
+
+    def __contains__(self, r):
+        return self.vectors[r] != 0
+
+    def __len__(self):
+        return len(self.vectors) - self.vectors.count(0)
+
+
+
+# Some sample tests, not very high coverage.
+class TestRanking():
+
+    def test(self):
+        print "\n---RUNNING TESTS---\n"
+
+        self.test_rank()
+        self.test_dense_table()
+        self.test_move_value_table()
+
+        print "\n---ALL TESTS PASS---\n"
+
+
+    def test_rank(self):
+
+        assert rank((-1,) * 9) == 0
+        assert rank((1,) * 9) == 3 ** 9 - 1
+        assert rank((0,0,0, 0,0,0, 0,0,-1)) == 3 ** 9 // 2 - 1
+
+        boards = [(1,0,-1, 0,0,0, 0,0,0), (-1,1,1, 1,1,1, 1,1,1),
+                  (0,0,0, 0,0,0, 0,0,0), (1,0,-1, 0,0,0, 0,0,1)]
+        for board in boards:
+            assert unrank(rank(board), 9) == board
+        assert sorted(boards, key=rank) == sorted(boards)
+
+        for r in range(3 ** 4):
+            assert rank(unrank(r, 4)) == r
+
+        print '\t* test_rank passes'
+
+
+    def test_dense_table(self):
+
+        import tictactoe01
+
+        game = tictactoe01.TicTacToe()
+        game.build_best_responses()
+
+        table = DenseTable(game.SIZE)
+        table.update(game.best_responses)
+
+        assert len(table) == 5478
+        for board, response in game.best_responses.iteritems():
+            assert rank(board) in table
+            assert table[rank(board)] == response
+
+        assert rank((1,1,1, 1,1,1, 1,1,1)) not in table
+        try:
+            table[rank((1,1,1, 1,1,1, 1,1,1))]
+            assert False
+        except KeyError:
+            pass
+
+        print '\t* test_dense_table passes'
+
+
+    def test_move_value_table(self):
+
+        table = MoveValueTable(4)
+        values = [None, 1, -1, 0]
+        assert table.pack(values) == 0b10011100
+        table.add(rank((1,0,0,0)), table.pack(values))
+        table.add(rank((1,-1,1,-1)), 0)
+
+        assert len(table) == 2
+        assert table[rank((1,0,0,0))] == values
+        assert table[rank((1,-1,1,-1))] == [None] * 4
+        assert rank((0,0,0,0)) not in table
+        try:
+            table[rank((0,0,0,0))]
+            assert False
+        except KeyError:
+            pass
+
+        print '\t* test_move_value_table passes'
+
+
+
+if __name__ == '__main__':
+
+    tests = TestRanking()
+    tests.test()
+
+    import tictactoe01
+
+    game = tictactoe01.TicTacToe()
+    game.build_best_responses()
+    table = DenseTable(game.SIZE)
+    table.update(game.best_responses)
+
+    boards = list(game.best_responses) * 20
+    ranks = [rank(board) for board in boards]
+
+    print "Timing %d lookups in best_responses..." % len(boards)
+    funtime(lambda: [game.best_responses[board] for board in boards])
+
+    print "Timing %d lookups in DenseTable by rank..." % len(ranks)
+    funtime(lambda: [table.moves[r] for r in ranks])
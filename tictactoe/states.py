@@ -0,0 +1,328 @@
+# Walk every reachable tic-tac-toe board, without keeping them all in memory.
+
+# The solvers only ever see the reachable boards as keys of best_responses,
+# so counting them means building the whole table first. For WIDTH = 4
+# that is tens of millions of tuples. Here the boards are generated ply by
+# ply, straight from the pieces on the board: a board after ply moves has
+# (ply + 1) // 2 X's and ply // 2 O's, and every way of placing them is
+# tried in turn, as bitboards. Nothing needs to be remembered to avoid
+# duplicates, because each placement is only made once.
+
+# Not every placement is reachable, since the game stops at the first
+# win. A placement is reachable if and only if:
+#     * the loser has no line, and
+#     * if the last player to move has a line, some square of theirs is in
+#       all of their lines. That piece was their winning move, and without
+#       it there is no win, so the game could have got this far.
+# So whether a board is reachable only depends on the board itself, and
+# every ply can be streamed out with bounded memory.
+
+# With canonical=True, only one board of each class of equivalent boards is
+# yielded, the one chosen by tictactoe04.canonical_bits. This is again a
+# test on the board alone.
+
+# write_boards streams boards to a file as an array of their ranks (see
+# ranking.py), and read_boards streams them back, a chunk at a time.
+# state_stats gathers counts per ply in a single pass.
+
+# Board file format:
+#     header (8 bytes):
+#         magic        4 bytes, 'TTTR'
+#         format       uint16 little-endian, FORMAT_VERSION
+#         byte order   1 byte, '<' (little-endian)
+#         typecode     1 byte, 'Q' (uint64), the struct code of a rank
+#     ranks            one for each board, in order
+
+
+import itertools
+import os
+import struct
+import sys
+
+import ranking
+import tictactoe04
+from benchmark import funtime
+
+
+# Boards are written and read this many at a time.
+CHUNK_SIZE = 2**16
+
+MAGIC = 'TTTR'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHcc')
+BYTE_ORDER = '<'
+RANK_CODE = 'Q'
+RANK_BYTES = struct.calcsize(BYTE_ORDER + RANK_CODE)
+
+
+def bits_at_ply(game, ply, canonical=False):
+    """Yield (x, o) for the bitboards of every reachable board after ply
+    moves, where game is a tictactoe04.TicTacToe of the right WIDTH.
+    """
+    num_x = (ply + 1) // 2
+    num_o = ply // 2
+    squares = range(game.SIZE)
+    x_last = ply % 2 == 1 # X made the last move
+
+    for x_squares in itertools.combinations(squares, num_x):
+        x = sum(1 << i for i in x_squares)
+        x_lines = [mask for mask in game.win_masks if x & mask == mask]
+        if x_lines and not x_last:
+            continue
+        if x_lines and not reduce(lambda a, b: a & b, x_lines):
+            continue
+
+        rest = [i for i in squares if not x >> i & 1]
+        for o_squares in itertools.combinations(rest, num_o):
+            o = sum(1 << i for i in o_squares)
+            o_lines = [mask for mask in game.win_masks if o & mask == mask]
+            if o_lines:
+                if x_last or x_lines:
+                    continue
+                if not reduce(lambda a, b: a & b, o_lines):
+                    continue
+            if canonical and game.canonical_bits(x, o) != (x, o):
+                continue
+            yield x, o
+
+
+def boards_at_ply(ply, WIDTH=3, canonical=False, game=None):
+    """Yield the flat board tuple of every reachable board after ply moves.
+
+    game is a tictactoe04.TicTacToe of the right WIDTH to use, if there
+    is one already.
+    """
+    if game is None:
+        game = tictactoe04.TicTacToe(WIDTH)
+    for x, o in bits_at_ply(game, ply, canonical):
+        yield game.to_board(x, o)
+
+
+def plies(WIDTH=3, canonical=False):
+    """Yield (ply, boards) for each ply of the game, in order, where boards
+    is a generator of the boards after ply moves, as from boards_at_ply.
+    """
+    game = tictactoe04.TicTacToe(WIDTH)
+    for ply in range(game.SIZE + 1):
+        yield ply, boards_at_ply(ply, WIDTH, canonical, game)
+
+
+def reachable_boards(WIDTH=3, canonical=False):
+    "Yield every reachable board, one ply after another."
+    for ply, boards in plies(WIDTH, canonical):
+        for board in boards:
+            yield board
+
+
+def write_boards(boards, path, chunk_size=CHUNK_SIZE):
+    """Write an iterable of flat board tuples to path, as an array of their
+    ranks, chunk_size boards at a time. Returns the number of boards written.
+    """
+    n = 0
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER, RANK_CODE))
+        chunk = []
+        for board in boards:
+            chunk.append(ranking.rank(board))
+            if len(chunk) == chunk_size:
+                write_ranks(f, chunk)
+                n += len(chunk)
+                chunk = []
+        write_ranks(f, chunk)
+        n += len(chunk)
+    return n
+
+
+def write_ranks(f, ranks):
+    "Write a list of ranks to the file f, in the format of write_boards."
+    f.write(struct.pack('%s%d%s' % (BYTE_ORDER, len(ranks), RANK_CODE), *ranks))
+
+
+def read_boards(path, SIZE, chunk_size=CHUNK_SIZE):
+    """Yield the boards of size SIZE in a file written by write_boards.
+
+    Raises ValueError if it is not such a file.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        if (len(header) < HEADER.size or HEADER.unpack(header) !=
+                (MAGIC, FORMAT_VERSION, BYTE_ORDER, RANK_CODE)):
+            raise ValueError("%s is not a board file" % path)
+        while True:
+            data = f.read(chunk_size * RANK_BYTES)
+            if len(data) % RANK_BYTES:
+                raise ValueError("%s is truncated" % path)
+            n = len(data) // RANK_BYTES
+            for r in struct.unpack('%s%d%s' % (BYTE_ORDER, n, RANK_CODE), data):
+                yield ranking.unrank(r, SIZE)
+            if n < chunk_size:
+                return
+
+
+def state_stats(WIDTH=3):
+    """Return a list with a dict of counts for each ply of the game:
+        * ply
+        * boards: reachable boards after ply moves.
+        * x_wins, o_wins, draws: those of them where the game is over.
+        * classes: classes of equivalent boards among them.
+        * class_sizes: {n: number of classes of n boards}
+    """
+    game = tictactoe04.TicTacToe(WIDTH)
+    num_symmetries = game.NUM_SYMMETRIES
+
+    stats = []
+    for ply in range(game.SIZE + 1):
+        s = {'ply': ply, 'boards': 0, 'x_wins': 0, 'o_wins': 0, 'draws': 0,
+             'classes': 0, 'class_sizes': {}}
+        for x, o in bits_at_ply(game, ply, canonical=True):
+            # The size of the class is the number of distinct symmetries.
+            n = len(set((game.transform_bits(x, t), game.transform_bits(o, t))
+                        for t in range(num_symmetries)))
+            s['boards'] += n
+            s['classes'] += 1
+            s['class_sizes'][n] = s['class_sizes'].get(n, 0) + 1
+
+            win = game.check_win_bits(x, o, 1)
+            if win == 1:
+                s['x_wins'] += n
+            elif win == -1:
+                s['o_wins'] += n
+            elif win == 0:
+                s['draws'] += n
+        stats.append(s)
+    return stats
+
+
+def print_state_stats(stats):
+    "Print the per-ply counts from state_stats."
+    print "ply    boards    x wins    o wins   draws   classes  class sizes"
+    for s in stats:
+        sizes = ' '.join('%d:%d' % item for item in sorted(s['class_sizes'].items()))
+        print "%3d %9d %9d %9d %7d %9d  %s" % (
+            s['ply'], s['boards'], s['x_wins'], s['o_wins'], s['draws'],
+            s['classes'], sizes)
+
+
+
+# Some sample tests, not very high coverage.
+class TestStates():
+
+    def test(self):
+        print "\n---RUNNING TESTS---\n"
+
+        self.test_reachable_boards()
+        self.test_canonical()
+        self.test_write_boards()
+        self.test_state_stats()
+
+        print "\n---ALL TESTS PASS---\n"
+
+
+    def test_reachable_boards(self):
+
+        import tictactoe01
+
+        game = tictactoe01.TicTacToe()
+        game.build_best_responses()
+
+        boards = list(reachable_boards())
+        assert len(boards) == 5478
+        assert set(boards) == set(game.best_responses)
+
+        assert [len(list(ply_boards)) for ply, ply_boards in plies()] == \
+            [1, 9, 72, 252, 756, 1260, 1520, 1140, 390, 78]
+
+        # Each board is at the right ply.
+        for ply, boards in plies():
+            for board in boards:
+                assert 9 - board.count(0) == ply
+
+        print '\t* test_reachable_boards passes'
+
+
+    def test_canonical(self):
+
+        import tictactoe03
+
+        game = tictactoe03.TicTacToe(canonical=True)
+        game.build_best_responses()
+
+        boards = list(reachable_boards(canonical=True))
+        assert len(boards) == 765
+        assert (set(game.canonicalize(board)[0] for board in boards) ==
+                set(game.best_responses))
+
+        print '\t* test_canonical passes'
+
+
+    def test_write_boards(self):
+
+        import tempfile
+        import shutil
+
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'boards')
+            for ply in [0, 5, 9]:
+                assert write_boards(boards_at_ply(ply), path) == \
+                    len(list(boards_at_ply(ply)))
+                assert list(read_boards(path, 9)) == list(boards_at_ply(ply))
+
+            # Many chunks, the last one full
+            assert write_boards(reachable_boards(), path, 913) == 5478
+            assert list(read_boards(path, 9, 913)) == list(reachable_boards())
+
+            # Ranks are 8 bytes, little-endian, after the header.
+            with open(path, 'rb') as f:
+                data = f.read()
+            assert len(data) == HEADER.size + 8 * 5478
+            assert data[:HEADER.size] == 'TTTR\x01\x00<Q'
+            board = next(reachable_boards())
+            assert data[HEADER.size:HEADER.size + 8] == \
+                struct.pack('<Q', ranking.rank(board))
+
+            with open(path, 'wb') as f:
+                f.write('not a board file')
+            try:
+                list(read_boards(path, 9))
+                assert False
+            except ValueError:
+                pass
+        finally:
+            shutil.rmtree(directory)
+
+        print '\t* test_write_boards passes'
+
+
+    def test_state_stats(self):
+
+        stats = state_stats()
+
+        assert [s['boards'] for s in stats] == \
+            [1, 9, 72, 252, 756, 1260, 1520, 1140, 390, 78]
+        assert sum(s['classes'] for s in stats) == 765
+        assert sum(s['x_wins'] for s in stats) == 626
+        assert sum(s['o_wins'] for s in stats) == 316
+        assert sum(s['draws'] for s in stats) == 16
+        assert stats[0]['class_sizes'] == {1: 1}
+        assert stats[1]['class_sizes'] == {1: 1, 4: 2}
+
+        print '\t* test_state_stats passes'
+
+
+
+if __name__ == '__main__':
+
+    tests = TestStates()
+    tests.test()
+
+    # python states.py 4 for the WIDTH = 4 counts. They take a while.
+    WIDTH = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    print "Timing of streaming all boards for WIDTH = %d..." % WIDTH
+    funtime(lambda: sum(1 for board in reachable_boards(WIDTH)))
+
+    print "\n"
+
+    print "Counts per ply for WIDTH = %d..." % WIDTH
+    print_state_stats(state_stats(WIDTH))
@@ -0,0 +1,197 @@
+# Save a solved table of best responses to disk, and map it back into memory.
+
+# Every process that needs best responses otherwise has to build them itself
+# at startup, and hold its own copy. Instead, a ranking.DenseTable can be
+# written once to a file, and any number of processes can open that file
+# with mmap. Nothing is read or copied up front: lookups go straight to the
+# operating system's page cache, which is shared between all the processes.
+
+# File format, all integers little-endian:
+#     header (16 bytes):
+#         magic        4 bytes, 'TTTB'
+#         format       uint16, FORMAT_VERSION
+#         WIDTH        uint16
+#         solver       uint16, version of the solver that made the table
+#         padding      6 bytes
+#     moves            3 ** SIZE signed bytes, DenseTable.moves
+#     values           3 ** SIZE signed bytes, DenseTable.values
+
+# Both arrays are indexed by the rank of the board (see ranking.py).
+
+
+import mmap
+import os
+import struct
+
+import numpy as np
+
+import ranking
+
+
+MAGIC = 'TTTB'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHH6x')
+
+
+def table_path(directory, WIDTH, solver_version):
+    "Return the conventional file name for a table of the given kind."
+    return os.path.join(directory, 'tictactoe_w%d_v%d.tbl' % (WIDTH, solver_version))
+
+
+def write_table(path, table, WIDTH, solver_version):
+    """Write a ranking.DenseTable to path.
+
+    The file is written under a temporary name and then renamed, so other
+    processes never see a partly written table.
+    """
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, WIDTH, solver_version))
+        table.moves.tofile(f)
+        table.values.tofile(f)
+    os.rename(tmp_path, path)
+
+
+def open_table(path, WIDTH, solver_version):
+    """Return a MappedTable for the file at path.
+
+    Raises ValueError if it is not a table for this WIDTH and solver version.
+    """
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mm) < HEADER.size:
+        raise ValueError("%s is not a tic-tac-toe table" % path)
+    magic, format_version, WIDTH2, solver_version2 = HEADER.unpack_from(mm)
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        raise ValueError("%s is not a tic-tac-toe table" % path)
+    if (WIDTH2, solver_version2) != (WIDTH, solver_version):
+        raise ValueError("%s is a table for WIDTH = %d, solver version %d"
+                         % (path, WIDTH2, solver_version2))
+    if len(mm) != HEADER.size + 2 * 3 ** (WIDTH ** 2):
+        raise ValueError("%s is truncated" % path)
+
+    return MappedTable(mm, WIDTH, solver_version)
+
+
+class MappedTable():
+    """A ranking.DenseTable whose moves and values live in a memory-mapped file.
+
+    moves and values are read-only NumPy arrays over the mapped file, and
+    MappedTable can be used wherever a DenseTable is only read from.
+    """
+
+    def __init__(self, mm, WIDTH, solver_version):
+        self.mm = mm
+        self.WIDTH = WIDTH
+        self.SIZE = WIDTH ** 2
+        self.solver_version = solver_version
+
+        n = 3 ** self.SIZE
+        self.moves = np.frombuffer(mm, dtype=np.int8, count=n,
+                                   offset=HEADER.size)
+        self.values = np.frombuffer(mm, dtype=np.int8, count=n,
+                                    offset=HEADER.size + n)
+
+    def __getitem__(self, r):
+        "Return (move, value) for the board with rank r."
+        value = int(self.values[r])
+        if value == ranking.UNKNOWN:
+            raise KeyError(r)
+        move = int(self.moves[r])
+        return (None if move == -1 else move, value)
+
+    def __contains__(self, r):
+        return self.values[r] != ranking.UNKNOWN
+
+    def __len__(self):
+        return int((self.values != ranking.UNKNOWN).sum())
+
+    def close(self):
+        "Unmap the file. The table can't be used after this."
+        del self.moves, self.values
+        self.mm.close()
+
+
+
+# Some sample tests, not very high coverage.
+class TestTableFile():
+
+    def test(self):
+        print "\n---RUNNING TESTS---\n"
+
+        self.test_round_trip()
+        self.test_bad_files()
+
+        print "\n---ALL TESTS PASS---\n"
+
+
+    def test_round_trip(self):
+
+        import tempfile
+        import shutil
+        import tictactoe01
+
+        game = tictactoe01.TicTacToe()
+        game.build_best_responses()
+        table = ranking.DenseTable(game.SIZE)
+        table.update(game.best_responses)
+
+        directory = tempfile.mkdtemp()
+        try:
+            path = table_path(directory, 3, 1)
+            write_table(path, table, 3, 1)
+            assert os.listdir(directory) == ['tictactoe_w3_v1.tbl']
+
+            mapped = open_table(path, 3, 1)
+            assert len(mapped) == 5478
+            for board, response in game.best_responses.iteritems():
+                assert mapped[ranking.rank(board)] == response
+            assert ranking.rank((1,) * 9) not in mapped
+            mapped.close()
+        finally:
+            shutil.rmtree(directory)
+
+        print '\t* test_round_trip passes'
+
+
+    def test_bad_files(self):
+
+        import tempfile
+        import shutil
+
+        table = ranking.DenseTable(4)
+
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'table')
+            write_table(path, table, 2, 1)
+            open_table(path, 2, 1).close()
+
+            # Wrong WIDTH or solver version
+            for WIDTH, solver_version in [(3, 1), (2, 2)]:
+                try:
+                    open_table(path, WIDTH, solver_version)
+                    assert False
+                except ValueError:
+                    pass
+
+            # Not a table at all
+            with open(path, 'wb') as f:
+                f.write('not a table, just some text')
+            try:
+                open_table(path, 2, 1)
+                assert False
+            except ValueError:
+                pass
+        finally:
+            shutil.rmtree(directory)
+
+        print '\t* test_bad_files passes'
+
+
+
+if __name__ == '__main__':
+
+    tests = TestTableFile()
+    tests.test()
@@ -12,7 +12,8 @@
 # 7/7/2014
 
 import itertools
-from time import clock
+
+from benchmark import funtime
 
 
 
@@ -179,14 +180,6 @@ class TestTicTacToe():
         
         print 'test_build_best_responses passes'
 
-        
-        
-def funtime(fun, *args):
-    "Time the execution of function fun"
-    t0 = clock()
-    fun(*args)
-    t1 = clock()
-    print "Runtime: ", t1-t0
 
 
 if __name__ == '__main__':
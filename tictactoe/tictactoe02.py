@@ -21,10 +21,37 @@
 # In particular, rotations take most of the time.
 # This is a fairly complex operation, perhaps there is a way to simplify it.
 
+# Once best_responses is built, build_dense_table copies it into a
+# ranking.DenseTable, so get_best_response_rank can answer by indexing an
+# array with the rank of a board, without hashing any tuples.
+
+# load_dense_table goes one step further and maps a table that was saved
+# to disk (see tablefile.py), writing it first if there isn't one yet.
+# Processes that share the file share one copy of the table in memory,
+# and none of them have to build best_responses at all. This needs NumPy,
+# which is only imported when a table file is first used.
+
+# Without a dense table, get_best_response used to build best_responses from
+# the empty board on a miss. Now it only solves the game from the board that
+# was asked about, which is all it needs. That also works for boards that
+# can't come up in a game where X goes first: O may have gone first, or
+# one player may have been given extra pieces as a handicap. What stays the
+# same all through such a game is the parity offset,
+#     (number of X's - number of O's) - (0 if X is to move else 1),
+# which is 0 in the usual game. The same board means a different game for
+# each offset, so each offset gets its own table.
+
 
 
 import itertools
-from time import clock
+import os
+
+import ranking
+from benchmark import funtime
+
+
+# Stored in table files, so tables from an older solver are not reused.
+SOLVER_VERSION = 2
 
 
 
@@ -49,6 +76,14 @@ class TicTacToe():
     It is assumed without loss that X always goes first; thus,
     because X's and O's alternate, we can always tell whose turn it is 
     given the board configuration.
+
+    dense_table is the same information as a ranking.DenseTable, where
+    moves are stored as the flat index i*WIDTH + j of square (i, j).
+    It is None until build_dense_table or load_dense_table is called.
+
+    offset_best_responses holds a best_responses dict for each nonzero
+    parity offset (see parity_offset), for games that didn't start with X
+    to move on an empty board. It is filled by get_best_response.
     """
 
     def __init__(self, WIDTH=3):
@@ -57,15 +92,125 @@ class TicTacToe():
         self.NUM_DIAGS = 2
 
         self.best_responses = {}
+        self.dense_table = None
+        self.offset_best_responses = {}
 
     
-    def get_best_response(self, board):
-        "Return best response to board configuration."
+    def get_best_response(self, board, player=None):
+        """Return best response to board configuration.
+
+        player = 1 for X, -1 for O, is the player to move. If None, it is
+        inferred from the board assuming X went first.
+
+        If board is not in best_responses, it is looked up in dense_table
+        if there is one, and otherwise the game is solved from board on.
+        """
+        if player is None:
+            # Any board in best_responses has X going first, like player.
+            try:
+                return self.best_responses[board][0]
+            except KeyError:
+                player = self.next_player(board)
+        offset = self.parity_offset(board, player)
+        table = self.responses_for_offset(offset)
         try:
-            return self.best_responses[board][0]
+            return table[board][0]
         except KeyError:
-            self.build_best_responses()
-            return self.best_responses[board][0]
+            if offset == 0 and self.dense_table is not None:
+                try:
+                    return self.get_best_response_rank(self.rank(board))
+                except KeyError:
+                    pass # not reachable from the empty board
+            self.solve_subtree(board, player)
+            return table[board][0]
+
+
+    def solve_subtree(self, board, player):
+        """Add board, and every board that could follow it, to the
+        best_responses dict for its parity offset.
+        """
+        offset = self.parity_offset(board, player)
+        best_responses = self.best_responses
+        # build_best_responses fills in self.best_responses, so the table
+        # for this offset stands in for it until it is done.
+        self.best_responses = self.responses_for_offset(offset)
+        try:
+            self.build_best_responses(board, player)
+        finally:
+            self.best_responses = best_responses
+
+
+    def next_player(self, board):
+        "Return the player to move, assuming X went first."
+        squares = list(itertools.chain.from_iterable(board))
+        if squares.count(1) == squares.count(-1):
+            return 1
+        else:
+            return -1
+
+
+    def parity_offset(self, board, player):
+        """Return (number of X's - number of O's) - (0 if player is X else 1),
+        which is the same for every board of a game, and 0 if X went first.
+        """
+        squares = list(itertools.chain.from_iterable(board))
+        return squares.count(1) - squares.count(-1) - (0 if player == 1 else 1)
+
+
+    def responses_for_offset(self, offset):
+        "Return the best_responses dict for games with the given parity offset."
+        if offset == 0:
+            return self.best_responses
+        return self.offset_best_responses.setdefault(offset, {})
+
+
+    def get_best_response_rank(self, r):
+        """Return best response to the board with rank r (see rank).
+
+        This is answered from dense_table, which must have been built.
+        """
+        if self.dense_table.values[r] == ranking.UNKNOWN:
+            raise KeyError(r)
+        move = int(self.dense_table.moves[r])
+        if move == -1:
+            return None
+        return divmod(move, self.WIDTH)
+
+
+    def build_dense_table(self):
+        """Build dense_table from best_responses, building that first if needed.
+
+        get_best_response may have solved only part of the game, so the
+        rest is always filled in from the empty board first.
+        """
+        self.build_best_responses()
+
+        self.dense_table = ranking.DenseTable(self.SIZE)
+        for board, (move, value) in self.best_responses.iteritems():
+            if move is not None:
+                move = move[0] * self.WIDTH + move[1]
+            self.dense_table.add(self.rank(board), move, value)
+
+
+    def load_dense_table(self, directory):
+        """Map the table file for this WIDTH in directory as dense_table.
+
+        If there is no such file, it is built and saved first.
+        """
+        # tablefile needs NumPy, which nothing else here does.
+        import tablefile
+
+        path = tablefile.table_path(directory, self.WIDTH, SOLVER_VERSION)
+        if not os.path.exists(path):
+            if self.dense_table is None:
+                self.build_dense_table()
+            tablefile.write_table(path, self.dense_table, self.WIDTH, SOLVER_VERSION)
+        self.dense_table = tablefile.open_table(path, self.WIDTH, SOLVER_VERSION)
+
+
+    def rank(self, board):
+        "Return the rank of board, i.e. its index in dense_table."
+        return ranking.rank(itertools.chain.from_iterable(board))
                 
 
     def build_best_responses(self, board=None, player=None):
@@ -243,6 +388,9 @@ class TestTicTacToe():
         self.test_symmetries()
         self.test_check_win()
         self.test_build_best_responses()
+        self.test_dense_table()
+        self.test_load_dense_table()
+        self.test_get_best_response()
         
         print "\n---ALL TESTS PASS---\n"
     
@@ -309,14 +457,107 @@ class TestTicTacToe():
         
         print '\t* test_build_best_responses passes'
 
-        
-        
-def funtime(fun, *args):
-    "Time the execution of function fun"
-    t0 = clock()
-    fun(*args)
-    t1 = clock()
-    print "Runtime: ", t1-t0
+
+    def test_dense_table(self):
+
+        game = TicTacToe()
+        game.build_dense_table()
+
+        assert len(game.dense_table) == len(game.best_responses)
+        for board, (move, value) in game.best_responses.iteritems():
+            assert game.get_best_response_rank(game.rank(board)) == move
+
+        r = game.rank(((1,1,0), (0,-1,-1), (0,0,0)))
+        assert game.get_best_response_rank(r) == (0,2)
+        assert game.dense_table[r] == (2, 1)
+
+        print '\t* test_dense_table passes'
+
+
+    def test_load_dense_table(self):
+
+        import tempfile
+        import shutil
+
+        directory = tempfile.mkdtemp()
+        try:
+            # The first game has to build and save the table...
+            game = TicTacToe()
+            game.load_dense_table(directory)
+            assert len(game.best_responses) == 5478
+
+            # ...but later ones just map it.
+            game = TicTacToe()
+            game.load_dense_table(directory)
+            assert game.best_responses == {}
+            assert game.get_best_response(((1,1,0), (0,-1,-1), (0,0,0))) == (0,2)
+            assert game.get_best_response(((1,-1,1), (-1,1,-1), (1,-1,1))) is None
+            assert game.best_responses == {}
+        finally:
+            shutil.rmtree(directory)
+
+        # A game that has only solved a subtree must still save all of it.
+        directory = tempfile.mkdtemp()
+        try:
+            game = TicTacToe()
+            game.get_best_response(((1,0,0), (0,-1,0), (0,0,1)))
+            game.load_dense_table(directory)
+            assert len(game.best_responses) == 5478
+
+            game = TicTacToe()
+            game.load_dense_table(directory)
+            assert len(game.dense_table) == 5478
+            assert game.get_best_response_rank(game.rank(((1,0,0), (0,0,0), (0,0,0)))) is not None
+            assert game.best_responses == {}
+        finally:
+            shutil.rmtree(directory)
+
+        print '\t* test_load_dense_table passes'
+
+
+    def test_get_best_response(self):
+
+        full = TicTacToe()
+        full.build_best_responses()
+
+        # Only the subtree under the board is solved.
+        board = ((1,0,0), (0,-1,0), (0,0,1))
+        game = TicTacToe()
+        move = game.get_best_response(board)
+        assert game.best_responses[board] == (move, full.best_responses[board][1])
+        assert len(game.best_responses) < len(full.best_responses) / 10
+        for board2, (move2, value2) in game.best_responses.iteritems():
+            assert full.best_responses[board2][1] == value2
+        assert game.offset_best_responses == {}
+
+        # A handicap: X starts with two pieces, and O must block.
+        board = ((1,1,0), (0,0,0), (0,0,0))
+        assert game.parity_offset(board, -1) == 1
+        assert game.get_best_response(board) == (0,2)
+        assert game.offset_best_responses[1][board] == ((0,2), -1)
+        assert board not in game.best_responses
+
+        # O goes first. The empty board is a draw either way, but it is a
+        # different game than with X to move.
+        empty = ((0,0,0), (0,0,0), (0,0,0))
+        assert game.parity_offset(empty, -1) == -1
+        game.get_best_response(empty, -1)
+        assert game.offset_best_responses[-1][empty][1] == 0
+        assert empty not in game.best_responses
+        board = ((-1,-1,0), (1,1,0), (0,0,0))
+        move = game.get_best_response(board, -1)
+        assert game.offset_best_responses[-1][board] == (move, 1)
+
+        # Boards that are not in the dense table are solved too.
+        game = TicTacToe()
+        game.build_dense_table()
+        board = ((1,1,1), (-1,-1,-1), (0,0,0))
+        assert game.get_best_response(board, 1) is None
+        board = ((1,1,0), (0,0,0), (0,0,0))
+        assert game.get_best_response(board) == (0,2)
+        assert board in game.offset_best_responses[1]
+
+        print '\t* test_get_best_response passes'
 
 
 
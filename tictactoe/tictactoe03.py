@@ -10,6 +10,11 @@
 #     python -m cProfile tictactoe02.py 
 # there is no single dominant bottleneck.
 # It might be time to try a different approach.
+# cProfile can only say where the time goes, though, not how much work the
+# solver did. With profile=True, build_best_responses returns a SolverStats
+# with counts of nodes, cache hits and so on. The counting versions of the
+# methods are put on the instance in __init__, so a solver without profile
+# runs exactly the same code as before.
 
 # I exploit the symmetries of the tic-tac-toe board positions to reduce
 # the problem. In addition, to accelerate the process of rotating and reflecting
@@ -17,10 +22,45 @@
 # and apply that permutation directly. It doesn't save that much time, given
 # that it wasn't a bottleneck. However, it's an interesting approach that could
 # be used more generally when a complex transformation has to be performed repeatedly.
+# Executing a permutation was itself a Python loop, one element at a time, so
+# each permutation is now compiled once into an operator.itemgetter, which
+# builds the whole permuted tuple in C.
+# The 8 symmetries themselves used to take 7 rotations and reflections, one
+# after the other. Now they are all worked out once, as permutations, by
+# closing the rotation and the reflection under composition (permgroup.py),
+# and each symmetric copy of a board is one compiled permutation.
+
+# Symmetries also save work on the way down. Some boards are their own
+# rotations or reflections, like the empty board, and then so are some of
+# their moves: on the empty board, all 4 corners lead to the same game, and
+# so do all 4 edges. move_orbits groups the empty squares of a board by the
+# symmetries that leave it unchanged (its stabilizer), and only the
+# smallest square of each group is searched, so the empty board has 3
+# moves to try instead of 9. The others would have the same value, and the
+# smallest square always comes first, so the best move found is the same.
+
+# Storing all 8 symmetric copies of every board makes best_responses 8 times
+# bigger than it needs to be. With canonical=True, only one representative of
+# each class of equivalent boards is stored (the smallest of the 8 tuples),
+# and lookup maps the stored move back onto the board that was asked about.
+
+# The solver has no preference for winning sooner rather than later, which
+# makes for long games against it. With depth_aware=True, a finished game is
+# scored by how many squares were left empty: a win is worth empties + 1
+# rather than 1, and a loss -(empties + 1). The best move is then the one
+# that wins fastest, or loses slowest, and depth_to_mate can tell how many
+# moves are left in the game when both players play their best.
 
 
 import itertools
-from time import clock
+from timeit import default_timer
+
+import permgroup
+from benchmark import funtime
+
+
+# Compiled permutations, keyed by (perm, WIDTH). See compile_perm.
+_compiled_perms = {}
 
 
 
@@ -38,15 +78,22 @@ class TicTacToe():
             (or move = None if there is nowhere left to go).
         * value: the value of that move to the player who makes it.
             value = +1/-1/0 for a win/loss/draw, respectively.
+            If depth_aware is True, it is +/-(empties + 1) for a win/loss,
+            where empties is the number of empty squares left at the end.
 
     Given a board, the corresponding (move, value) is from the 
     perspective of the player whose turn it is to go next.        
     It is assumed without loss that X always goes first; thus,
     because X's and O's alternate, we can always tell whose turn it is 
     given the board configuration.
+
+    If canonical is True, best_responses only has a key for the canonical
+    form of each board (see canonicalize), and its move is a move on that
+    canonical board. Use lookup to get the (move, value) for any board.
     """
 
-    def __init__(self, WIDTH=3):
+    def __init__(self, WIDTH=3, canonical=False, depth_aware=False,
+                 profile=False):
         self.WIDTH = WIDTH
         self.SIZE = WIDTH ** 2
         self.NUM_DIAGS = 2
@@ -56,6 +103,40 @@ class TicTacToe():
         # Precomputing to speed up board reflection and rotation
         self.rotation_perm = self.extract_perm(self.rotate_raw)
         self.reflection_perm = self.extract_perm(self.reflect_raw)                
+        self.rotate_compiled = self.compile_perm(self.rotation_perm)
+        self.reflect_compiled = self.compile_perm(self.reflection_perm)
+
+        # All 8 symmetries as direct lookups, in the order symmetries yields
+        # them: the ith symmetry of board has board[perm[j]] in square j.
+        # rotation_perm and reflection_perm say where each square goes, so
+        # they are inverted first. The order is the original one, each
+        # rotation followed by its reflection, so that ties between
+        # symmetries go the same way as they always have.
+        rotation = permgroup.invert(self.rotation_perm)
+        reflection = permgroup.invert(self.reflection_perm)
+        order = []
+        perm = permgroup.identity(self.SIZE)
+        for _ in range(4):
+            for p in [perm, permgroup.compose(perm, reflection)]:
+                # Small boards have fewer distinct symmetries.
+                if p not in order:
+                    order.append(p)
+            perm = permgroup.compose(perm, rotation)
+        self.symmetry_group = permgroup.PermGroup([rotation, reflection], order)
+        self.symmetry_perms = self.symmetry_group.elements
+        # inverse_perms[t][i] is the square of the tth symmetry of board
+        # where square i of board ends up.
+        self.inverse_perms = [self.symmetry_perms[t]
+                              for t in self.symmetry_group.inverses]
+
+        self.canonical = canonical
+        self.depth_aware = depth_aware
+
+        if profile:
+            self.stats = SolverStats()
+            self.install_profiling()
+        else:
+            self.stats = None
 
     def build_best_responses(self, board=None, player=None):
         """Recursively compute best responses for all subgames of current board.
@@ -73,6 +154,10 @@ class TicTacToe():
         if board is None:
             board = (0,) * self.SIZE
             player = 1
+
+        if self.canonical:
+            self.solve_canonical(board, player)
+            return
         
         if board in self.best_responses: 
             return
@@ -80,33 +165,207 @@ class TicTacToe():
         current_outcome = self.check_win(board, player)
         # If win/loss/draw has been determined, the game is over.
         if current_outcome is not None:
+            current_outcome = self.score(board, current_outcome)
             for board2 in self.symmetries(board):
                 self.best_responses[board2] = (None, current_outcome) # None => no move needed
             return
                 
         # If we don't know the best response yet, compute it.
-        best_value = -2 
-        for i in range(self.SIZE):
-            if board[i] == 0: # True at least once
-                # Replace ith spot with player's move
-                board2 = board[:i] + (player,) + board[i+1:]
-                                                    
-                # If board2 is already in best_responses, this does nothing.
-                # Otherwise, it ensures board2 is added to best_responses.
-                self.build_best_responses(board2, -1 * player)
-                # player's value given board2 is the reverse of the next 
-                # player's value
-                value = -1 * self.best_responses[board2][1]
-                if value > best_value:
-                    best_value, best_move = value, i
+        board_syms = list(self.symmetries(board))
+        best_value = -self.SIZE - 2 # less than any value
+        for i in self.move_orbits(board, board_syms): # one empty square per orbit
+            # Replace ith spot with player's move
+            board2 = board[:i] + (player,) + board[i+1:]
+                                                
+            # If board2 is already in best_responses, this does nothing.
+            # Otherwise, it ensures board2 is added to best_responses.
+            self.build_best_responses(board2, -1 * player)
+            # player's value given board2 is the reverse of the next 
+            # player's value
+            value = -1 * self.best_responses[board2][1]
+            if value > best_value:
+                best_value, best_move = value, i
         
         # ROTATIONS/REFLECTIONS: All 8 are added to best_responses at once.
         best_move_board = (0,)*best_move + (player,) + (0,)*(self.SIZE - best_move - 1)
-        for board2, best_move2 in zip(self.symmetries(board), self.symmetries(best_move_board)):
+        for board2, best_move2 in zip(board_syms, self.symmetries(best_move_board)):
             best_move2 = best_move2.index(player)
             self.best_responses[board2] = (best_move2, best_value)
 
         
+
+    def solve_canonical(self, board, player):
+        """Same as build_best_responses, but only canonical boards are added
+        to best_responses.
+
+        Returns the value of board to player.
+        """
+        # The same as self.canonicalize(board)[0], keeping the symmetries
+        # for move_orbits.
+        board_syms = list(self.symmetries(board))
+        board = min(board_syms)
+        if board in self.best_responses:
+            return self.best_responses[board][1]
+
+        current_outcome = self.check_win(board, player)
+        if current_outcome is not None:
+            current_outcome = self.score(board, current_outcome)
+            self.best_responses[board] = (None, current_outcome)
+            return current_outcome
+
+        # Moves are made on the canonical board, so best_move needs no
+        # translation before it is stored.
+        best_value = -self.SIZE - 2
+        for i in self.move_orbits(board, board_syms):
+            board2 = board[:i] + (player,) + board[i+1:]
+            value = -1 * self.solve_canonical(board2, -1 * player)
+            if value > best_value:
+                best_value, best_move = value, i
+
+        self.best_responses[board] = (best_move, best_value)
+        return best_value
+
+
+    def move_orbits(self, board, board_syms=None):
+        """Return the smallest empty square of each orbit of the empty squares
+        of board under its stabilizer, in increasing order.
+
+        The stabilizer is the symmetries that leave board unchanged. Moves
+        to squares of the same orbit lead to equivalent boards.
+        board_syms is a list of the symmetries of board, or of any board
+        equivalent to it, if they are already known.
+        """
+        if board_syms is None:
+            board_syms = list(self.symmetries(board))
+        # Most boards are only left unchanged by the identity.
+        if board_syms.count(board) == 1:
+            return [i for i in range(self.SIZE) if board[i] == 0]
+
+        stabilizer = [perm for perm, board2
+                      in zip(self.symmetry_perms, self.symmetries(board))
+                      if board2 == board]
+        # The orbit of i is [perm[i] for perm in stabilizer].
+        return [i for i in range(self.SIZE)
+                if board[i] == 0 and all(perm[i] >= i for perm in stabilizer)]
+
+
+    def install_profiling(self):
+        """Replace build_best_responses and the methods it relies on, for
+        this instance only, by versions that count their work in self.stats.
+        build_best_responses then returns self.stats.
+        """
+        stats = self.stats
+        check_win, symmetries = self.check_win, self.symmetries
+        # How much best_responses grew in the calls made by each call
+        # on the stack, so each can tell what it stored itself.
+        nested = []
+
+        def counted(solve):
+            def profiled_solve(board=None, player=None):
+                stats.depth += 1
+                stats.max_depth = max(stats.max_depth, stats.depth)
+                size = len(self.best_responses)
+                nested.append(0)
+                try:
+                    return solve(board, player)
+                finally:
+                    stats.depth -= 1
+                    grown = len(self.best_responses) - size
+                    stored = grown - nested.pop()
+                    if nested:
+                        nested[-1] += grown
+                    # Anything that is not a hit stores at least board itself.
+                    if stored:
+                        stats.misses += 1
+                        stats.symmetry_writes += stored - 1
+                    else:
+                        stats.hits += 1
+            return profiled_solve
+
+        def profiled_check_win(board, player):
+            start = default_timer()
+            outcome = check_win(board, player)
+            stats.check_win_time += default_timer() - start
+            if outcome is not None:
+                stats.terminals += 1
+            return outcome
+
+        def profiled_symmetries(board):
+            start = default_timer()
+            boards = list(symmetries(board))
+            stats.symmetries_time += default_timer() - start
+            return boards
+
+        # The recursion goes through self, so it picks these up.
+        if self.canonical:
+            self.solve_canonical = counted(self.solve_canonical)
+            build = self.build_best_responses
+        else:
+            build = counted(self.build_best_responses)
+
+        def profiled_build(board=None, player=None):
+            build(board, player)
+            return stats
+
+        self.build_best_responses = profiled_build
+        self.check_win = profiled_check_win
+        self.symmetries = profiled_symmetries
+
+
+    def score(self, board, outcome):
+        """Return the value of a finished game with the given outcome
+        (as returned by check_win).
+
+        If depth_aware, a win or loss counts for more the sooner it happens.
+        """
+        if self.depth_aware:
+            return outcome * (board.count(0) + 1)
+        return outcome
+
+
+    def depth_to_mate(self, board):
+        """Return the number of moves left before the game on board is won,
+        with best play on both sides, or None if it will be a draw.
+
+        Requires depth_aware, and board must be in best_responses.
+        """
+        if not self.depth_aware:
+            raise ValueError("depth_to_mate requires depth_aware=True")
+        value = self.lookup(board)[1]
+        if value == 0:
+            return None
+        return board.count(0) + 1 - abs(value)
+
+
+    def canonicalize(self, board):
+        """Return (key, transform_id) where key is the canonical form of board.
+
+        The canonical form is the smallest of the 8 symmetries of board,
+        and key = the symmetry given by self.symmetry_perms[transform_id].
+        """
+        key, transform_id = min(
+            (getter(board), t)
+            for t, getter in enumerate(self.symmetry_group.getters)
+        )
+        return key, transform_id
+
+
+    def lookup(self, board):
+        """Return the best response (move, value) to board.
+
+        In canonical mode, the move stored for the canonical form of board is
+        mapped back to the corresponding square of board.
+        """
+        if not self.canonical:
+            return self.best_responses[board]
+
+        key, transform_id = self.canonicalize(board)
+        move, value = self.best_responses[key]
+        if move is not None:
+            # key[move] == board[perm[move]], so perm takes us back.
+            move = self.symmetry_perms[transform_id][move]
+        return (move, value)
+
                     
     def check_win(self, board, player):
         """Evaluate the current board to determine if there is a winner.
@@ -152,20 +411,16 @@ class TicTacToe():
         (Mirror images and rotations)
         
         All 8 symmetries of a square can be generated as the 4 rotations
-        together with their reflections.
+        together with their reflections. They are precomputed in
+        symmetry_group, so each one is a single permutation of board.
         
         board is a tuple.
-        symmetries is a generator yielding tuples, the 8 symmetries of the board.
+        symmetries is a generator yielding tuples, the 8 symmetries of the
+        board, in the order of symmetry_perms.
         
         """        
-        board1 = tuple(board)
-        yield board1
-        yield self.reflect(board1)
-        
-        for _ in range(3):
-            board1 = self.rotate(board1)
-            yield board1
-            yield self.reflect(board1)
+        for getter in self.symmetry_group.getters:
+            yield getter(board)
         
 
     # These are the operations we actually USE to reflect and rotate
@@ -174,14 +429,14 @@ class TicTacToe():
            The reflection operation is accelerated by executing a
            precomputed permutation template.
         """
-        return self.execute_perm(board, self.reflection_perm)
+        return self.reflect_compiled(board)
         
     def rotate(self, board):
         """Return board rotated 90 degreese clockwise.
            The reflection operation is accelerated by executing a
            precomputed permutation template.
         """
-        return self.execute_perm(board, self.rotation_perm)
+        return self.rotate_compiled(board)
         
         
     # These are the ordinary reflect and rotation operations, with no
@@ -214,11 +469,25 @@ class TicTacToe():
         
     def execute_perm(self, board, perm):
         "Execute an extracted permutation on board"
+        return self.compile_perm(perm)(board)
+
+    def execute_perm_loop(self, board, perm):
+        "Same as execute_perm, one element at a time."
         board2 = [0] * self.SIZE
         for i1, i2 in enumerate(perm):
             board2[i2] = board[i1]
         return tuple(board2)
 
+    def compile_perm(self, perm):
+        """Return a function that executes an extracted permutation on a board,
+        compiled on first use and cached per perm and WIDTH."""
+        key = (tuple(perm), self.WIDTH)
+        if key not in _compiled_perms:
+            # perm says where each square goes; the getter needs where each
+            # square comes from.
+            _compiled_perms[key] = permgroup.perm_getter(permgroup.invert(perm))
+        return _compiled_perms[key]
+
         
     def flat_to_nested(self, flat_list):
         "Turn flat_list into nested list of rows"
@@ -229,6 +498,43 @@ class TicTacToe():
         return [x for row in nested_list for x in row]
     
     
+class SolverStats():
+    """Counts of the work done by a profiled build_best_responses:
+        * hits: boards that were already in best_responses.
+        * misses: boards that had to be solved, including finished games.
+        * terminals: finished games found by check_win.
+        * nodes: boards whose moves were searched, i.e. misses - terminals.
+        * symmetry_writes: symmetric copies stored along with solved boards.
+          A board that is its own copy under some symmetries is only
+          stored once, so this is less than 7 * misses.
+        * check_win_time, symmetries_time: seconds spent in those methods.
+        * max_depth: the deepest the recursion went.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.terminals = 0
+        self.symmetry_writes = 0
+        self.check_win_time = 0.0
+        self.symmetries_time = 0.0
+        self.depth = 0
+        self.max_depth = 0
+
+    @property
+    def nodes(self):
+        return self.misses - self.terminals
+
+    def report(self):
+        "Print the counts, one per line."
+        for name in ['nodes', 'hits', 'misses', 'terminals', 'symmetry_writes',
+                     'max_depth']:
+            print "%-16s %d" % (name, getattr(self, name))
+        for name in ['check_win_time', 'symmetries_time']:
+            print "%-16s %.4f s" % (name, getattr(self, name))
+
+
+
 # Some sample tests, not very high coverage.    
 class TestTicTacToe():
     
@@ -237,7 +543,12 @@ class TestTicTacToe():
         
         self.test_symmetries()
         self.test_check_win()
+        self.test_move_orbits()
         self.test_build_best_responses()
+        self.test_canonicalize()
+        self.test_canonical_best_responses()
+        self.test_depth_aware()
+        self.test_profile()
         
         print "\n---ALL TESTS PASS---\n"
     
@@ -270,6 +581,35 @@ class TestTicTacToe():
         
         for sym in should_be_syms:
             assert sym in a_Syms
+
+        # Each rotation, then its reflection, as the rotate/reflect loop
+        # always gave them. Ties between symmetric boards depend on it.
+        board1 = a
+        in_order = []
+        for _ in range(4):
+            in_order += [board1, game.reflect(board1)]
+            board1 = game.rotate(board1)
+        assert list(game.symmetries(a)) == in_order
+        game.build_best_responses()
+        assert game.best_responses[(0,0,0, 1,0,0, 0,0,0)] == (0, 0)
+
+        # Compiled permutations do the same as the loop, and are only
+        # compiled once.
+        for perm in [game.rotation_perm, game.reflection_perm, [2,0,1, 3,4,5, 6,7,8]]:
+            assert game.execute_perm(b, perm) == game.execute_perm_loop(b, perm)
+            assert game.compile_perm(perm) is game.compile_perm(tuple(perm))
+        assert TicTacToe(1).rotate((5,)) == (5,)
+
+        # The precomputed symmetries are the rotations and their reflections.
+        boards = [b]
+        for _ in range(3):
+            boards.append(game.rotate(boards[-1]))
+        boards += [game.reflect(board) for board in boards]
+        assert list(game.symmetries(b))[0] == b
+        assert sorted(game.symmetries(b)) == sorted(boards)
+        for t, sym in enumerate(game.symmetries(b)):
+            for i in range(9):
+                assert sym[game.inverse_perms[t][i]] == b[i]
                             
         print '\t* test_symmetries passes'
     
@@ -293,6 +633,21 @@ class TestTicTacToe():
         print '\t* test_check_win passes'
 
 
+    def test_move_orbits(self):
+
+        game = TicTacToe()
+
+        # Corner, edge or center
+        assert game.move_orbits((0,0,0, 0,0,0, 0,0,0)) == [0, 1, 4]
+        assert game.move_orbits((0,0,0, 0,1,0, 0,0,0)) == [0, 1]
+        # Only the diagonal through the X is a mirror.
+        assert game.move_orbits((1,0,0, 0,0,0, 0,0,0)) == [1, 2, 4, 5, 8]
+        # No symmetries
+        assert game.move_orbits((1,-1,0, 0,0,0, 0,0,0)) == [2, 3, 4, 5, 6, 7, 8]
+
+        print '\t* test_move_orbits passes'
+
+
     def test_build_best_responses(self):
         
         game = TicTacToe()
@@ -328,14 +683,113 @@ class TestTicTacToe():
         
         print '\t* test_build_best_responses passes'
 
-        
-        
-def funtime(fun, *args):
-    "Time the execution of function fun"
-    t0 = clock()
-    fun(*args)
-    t1 = clock()
-    print "Runtime: ", t1-t0
+
+    def test_canonicalize(self):
+
+        game = TicTacToe()
+
+        a = (1,1,1, 0,0,7, 0,0,0)
+        key, t = game.canonicalize(a)
+        assert key == min(game.symmetries(a))
+        assert key == tuple(a[j] for j in game.symmetry_perms[t])
+
+        # Every symmetry of a board has the same canonical form.
+        for a2 in game.symmetries(a):
+            assert game.canonicalize(a2)[0] == key
+
+        assert game.symmetry_perms[0] == tuple(range(game.SIZE))
+
+        print '\t* test_canonicalize passes'
+
+
+    def test_canonical_best_responses(self):
+
+        game = TicTacToe()
+        game.build_best_responses()
+        game_c = TicTacToe(canonical=True)
+        game_c.build_best_responses()
+
+        # 765 essentially different boards, rather than 5478.
+        if game.WIDTH == 3:
+            assert len(game_c.best_responses) == 765
+
+        for board, (move, value) in game.best_responses.items():
+            move2, value2 = game_c.lookup(board)
+            assert value2 == value
+            if move is None:
+                assert move2 is None
+            else:
+                # move2 must be an equally good move on the same board.
+                player = 1 if board.count(1) == board.count(-1) else -1
+                board2 = board[:move2] + (player,) + board[move2+1:]
+                assert board[move2] == 0
+                assert -game.best_responses[board2][1] == value
+
+        print '\t* test_canonical_best_responses passes'
+
+
+    def test_depth_aware(self):
+
+        game = TicTacToe()
+        game.build_best_responses()
+
+        for canonical in [False, True]:
+            game_d = TicTacToe(canonical=canonical, depth_aware=True)
+            game_d.build_best_responses()
+
+            # Now the solver prefers to win right away.
+            assert game_d.lookup((1,0,0, 1,-1,-1, 0,0,0)) == (6, 5)
+            assert game_d.depth_to_mate((1,0,0, 1,-1,-1, 0,0,0)) == 1
+            assert game_d.lookup((1,1,0, 0,-1,-1, 0,0,0)) == (2, 5)
+
+            # The finished game has no moves left, and the empty board is a draw.
+            assert game_d.depth_to_mate((1,-1,1, -1,1,-1, 1,-1,1)) == 0
+            assert game_d.depth_to_mate((0,0,0, 0,0,0, 0,0,0)) is None
+
+            # Wins, losses and draws are just as before.
+            for board, (move, value) in game.best_responses.iteritems():
+                value2 = game_d.lookup(board)[1]
+                assert cmp(value2, 0) == value
+
+        # O has lost, but blocking holds out for 4 more moves.
+        assert game_d.lookup((1,-1,0, 0,1,0, 0,0,0)) == (8, -3)
+        assert game_d.depth_to_mate((1,-1,0, 0,1,0, 0,0,0)) == 4
+
+        print '\t* test_depth_aware passes'
+
+
+    def test_profile(self):
+
+        # No instrumentation unless asked for
+        game = TicTacToe()
+        assert game.stats is None
+        assert 'build_best_responses' not in vars(game)
+
+        game2 = TicTacToe(profile=True)
+        stats = game2.build_best_responses()
+        assert stats is game2.stats
+        game.build_best_responses()
+        assert game2.best_responses == game.best_responses
+
+        # One board of each class is solved, along with its symmetric copies.
+        assert stats.misses == 765
+        assert stats.nodes + stats.terminals == stats.misses
+        assert stats.terminals == 138
+        assert stats.symmetry_writes == len(game2.best_responses) - stats.misses == 4713
+        assert stats.max_depth == 10
+        assert stats.hits > 0
+        assert stats.check_win_time > 0 and stats.symmetries_time > 0
+
+        game = TicTacToe(canonical=True, profile=True)
+        stats = game.build_best_responses()
+        assert stats.misses == 765
+        assert stats.terminals == 138
+        assert stats.symmetry_writes == 0
+        # Without move_orbits, there would be 1506.
+        assert stats.hits == 1332
+        assert stats.max_depth == 10
+
+        print '\t* test_profile passes'
 
 
 
@@ -356,6 +810,22 @@ if __name__ == '__main__':
     funtime(tictactoe.build_best_responses)
     print "Size of best_responses:", len(tictactoe.best_responses)
 
+    print "\n"
+
+    print "Timing for WIDTH = 3, canonical boards only..."
+    tictactoe = TicTacToe(3, canonical=True)
+    funtime(tictactoe.build_best_responses)
+    print "Size of best_responses:", len(tictactoe.best_responses)
+
+    print "\n"
+
+    for canonical in [False, True]:
+        print "Solver stats for WIDTH = 3%s..." % (
+            ", canonical boards only" if canonical else "")
+        tictactoe = TicTacToe(3, canonical=canonical, profile=True)
+        tictactoe.build_best_responses().report()
+        print
+
     # print "\n"
 
     # print "Timing for WIDTH = 4..."
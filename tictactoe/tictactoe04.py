@@ -0,0 +1,1369 @@
+# Find the best response to any tic-tac-toe board configuration.
+# taking a memoized approach.
+
+# This could be used as a starting point for a full game with the ability
+# to play tic-tac-toe against an intelligent computer.
+# It also serves as an example for how to find brute-force solutions for
+# more complex games where straightforward logic would not be possible.
+
+# This version changes the board representation rather than the algorithm.
+# In the earlier versions every node rebuilds each row, column and diagonal
+# as a new list just to sum it, and every move copies the whole board tuple.
+# Here a board is a pair of integer bitboards, one for the X's and one for
+# the O's. The win lines are precomputed once per WIDTH as bit masks, so
+# making a move is a single OR, a win is a mask comparison, and a draw is
+# a comparison against the full board mask.
+
+# The search itself is the same as in tictactoe01 (no symmetries), and it
+# visits squares in the same order, so the resulting table is identical.
+# best_responses can still be indexed with the usual flat board tuples.
+
+# Enumerating every reachable board is still hopeless for WIDTH = 4, so
+# there is also a solve method for answering a single query. It is a
+# negamax search with alpha-beta pruning and a transposition table, and it
+# only visits as much of the tree as it needs to prove the value of the
+# board. It leans heavily on a few cheap tic-tac-toe facts: if you can
+# complete a line you should, and if your opponent threatens to complete
+# a line you must block it (or lose, if there are two such threats).
+# forced_move sorts these out, for solve, best_move and solve_pn alike.
+
+# build_best_responses_parallel builds the same table using several
+# processes. The first plies are expanded here, and one board from each
+# class of equivalent boards at the end of them is sent to a worker process.
+# A worker works out, for every board under its board, the value and the set
+# of all best moves, and sends them back packed into two arrays. The
+# subtrees of different workers overlap, and the main process keeps each
+# board only once. The set of best moves of a rotated or reflected board is
+# just the rotated or reflected set, so the subtrees of the boards that were
+# not sent are filled in from the ones that were, stopping at boards that
+# are already in the table. Taking the first move in each set gives exactly
+# the same table as the serial solver.
+
+# depth_aware=True scores wins and losses by how soon they happen, as in
+# tictactoe03. In search this falls out of the shortcuts too: a win on the
+# spot with e empty squares is worth e, and two threats against us are
+# worth -(e - 1), since the opponent wins on the move after our block.
+
+# The table only keeps the best move, but solve_bits works out the value of
+# every move anyway before it picks one. With move_values=True, those are
+# kept too, in a ranking.MoveValueTable, so the value of any move from any
+# board is a lookup away. The rank of each board is passed down the search,
+# where a move changes it by a single power of 3.
+
+# Often all that matters is whether a board is won, lost or drawn, not by
+# how much, and solve_pn answers just that with depth-first proof-number
+# search (df-pn). Each board gets a proof number, roughly how many more
+# boards must be looked at to prove that the player to move gets what they
+# want, and a disproof number for the opposite. The search always goes
+# down to the board that would settle things soonest, so forced lines are
+# proved after looking at very little else. Two searches decide a board:
+# can the player to move win, and if not, can they hold a draw. The proof
+# and disproof numbers are kept in a table of at most pn_size entries.
+
+# When there is a time limit on an answer, best_move searches by iterative
+# deepening: one ply deep, then two, and so on, until the deadline, and
+# answers with the deepest search that finished. Boards at the end of a
+# search are scored by counting the pieces in lines that are still open.
+# solve is the same search, only deep enough to reach the end of the game
+# from anywhere, so it never stops early to estimate. The searches share
+# the transposition table, so every search starts with the best moves from
+# the one before. If a search proves a win or a loss, or reaches the end of
+# the game, the answer is exact and there is no need to go deeper.
+
+
+import array
+import collections
+import itertools
+import multiprocessing
+from timeit import default_timer
+
+import ranking
+import tictactoe03
+from benchmark import funtime
+
+
+# Transposition table flags: the stored value is exact, or only a
+# lower/upper bound on the true value because of an alpha-beta cutoff.
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Proof and disproof numbers of a board that is settled
+INFINITY = 2**30
+
+# best_move scores a win above any estimate of a board by evaluate.
+WIN_SCORE = 2**16
+
+# best_move reads the clock once every this many boards. Each board takes
+# some microseconds, so the deadline is overshot by well under a millisecond.
+CLOCK_NODES = 64
+
+
+class SearchTimeout(Exception):
+    "Raised by search when best_move runs out of time."
+
+
+class TicTacToe():
+    """Implements the basic components of a tic-tac-toe solver,
+    using bitboards.
+
+    A board is represented internally by two ints, x and o, where bit i of
+    x is set if there is an X in square i, and likewise for o. Squares are
+    numbered as in the flat tuple boards of tictactoe01/03, i.e. square i is
+    in row i // WIDTH and column i % WIDTH.
+
+    table is a dictionary where:
+        * each key is the int x | (o << SIZE), packing both bitboards.
+        * each value is a tuple, (move, value), exactly as in tictactoe01:
+            * move: an int in range(SIZE) indicating where the player should
+                move, or None if there is nowhere left to go.
+            * value: the value of that move to the player who makes it.
+                value = +1/-1/0 for a win/loss/draw, respectively.
+                If depth_aware is True, a win/loss is +/-(empties + 1), as
+                in tictactoe03.
+
+    best_responses is a view of table that is keyed by flat board tuples,
+    e.g. (-1, 0, 0, 1, 1, 0, 0, 0, 0), so it can be used in place of the
+    best_responses dict of the tuple-based solvers.
+
+    As before, the (move, value) for a board is from the perspective of
+    the player whose turn it is, and X always goes first.
+
+    tt is the transposition table used by solve and best_move. It holds at
+    most tt_size entries, and is only allocated on the first call to
+    either. Likewise, pn_table is used by solve_pn and holds at most
+    pn_size entries.
+
+    move_values is a ranking.MoveValueTable that build_best_responses fills
+    in with the value of every move from every board, if move_values=True,
+    or else None. With depth_aware, it only holds whether each move wins,
+    draws or loses.
+    """
+
+    def __init__(self, WIDTH=3, tt_size=2**20, depth_aware=False,
+                 move_values=False, pn_size=2**20):
+        self.WIDTH = WIDTH
+        self.SIZE = WIDTH ** 2
+        self.NUM_DIAGS = 2
+        self.NUM_SYMMETRIES = 8
+        self.depth_aware = depth_aware
+
+        # All squares filled
+        self.FULL = (1 << self.SIZE) - 1
+        # Precomputed once, used on every node
+        self.win_masks = self.build_win_masks()
+
+        self.table = {}
+        self.best_responses = BoardTable(self)
+
+        if move_values:
+            self.move_values = ranking.MoveValueTable(self.SIZE)
+            # Moving to square i adds player * powers[i] to the rank.
+            self.powers = [3 ** (self.SIZE - 1 - i) for i in range(self.SIZE)]
+        else:
+            self.move_values = None
+
+        # Squares through which the most lines pass are searched first,
+        # e.g. center, then corners, then edges for WIDTH = 3.
+        self.move_order = sorted(
+            (1 << i for i in range(self.SIZE)),
+            key=lambda bit: -sum(1 for mask in self.win_masks if mask & bit)
+        )
+
+        self.tt_size = tt_size
+        self.tt = None
+        self.pn_size = pn_size
+        self.pn_table = None
+        self.pn_nodes = 0 # boards expanded by solve_pn
+        self.search_nodes = 0 # boards visited by solve and best_move
+        self.deadline = None
+        self.timer = default_timer
+        # More than evaluate can ever return
+        self.max_estimate = len(self.win_masks) * WIDTH
+
+        # Only built on the first call to transform_bits
+        self.bit_perm_tables = None
+
+
+    def build_win_masks(self):
+        "Return a list of bit masks, one for each row, column and diagonal."
+        W = self.WIDTH
+        lines = ([[i*W + j for j in range(W)] for i in range(W)] +
+                 [[i*W + j for i in range(W)] for j in range(W)] +
+                 [[(W+1) * i for i in range(W)],
+                  [(W-1) + (W-1) * i for i in range(W)]]
+        )
+        return [sum(1 << i for i in line) for line in lines]
+
+
+    def build_bit_perm_tables(self):
+        """Return lookup tables to rotate/reflect bitboards a byte at a time:
+        tables[t][c][b] is where symmetry t sends the bits b of byte c of a
+        bitboard."""
+        bit_perm_tables = []
+        for perm in tictactoe03.TicTacToe(self.WIDTH).symmetry_perms:
+            # Symmetry t sends square perm[j] to square j.
+            dest = [0] * (self.SIZE + 8)
+            for j, i in enumerate(perm):
+                dest[i] = 1 << j
+            tables = []
+            for c in range(0, self.SIZE, 8):
+                # Each byte is the byte without its lowest bit, plus that bit.
+                table = [0] * 256
+                for b in range(1, 256):
+                    low = b & -b
+                    table[b] = table[b ^ low] | dest[c + low.bit_length() - 1]
+                tables.append(table)
+            bit_perm_tables.append(tables)
+        return bit_perm_tables
+
+
+    def build_best_responses(self, board=None, player=None):
+        """Recursively compute best responses for all subgames of current board.
+
+        Call with no arguments to build the entire best_responses dict.
+
+        board is a flat board tuple, as in tictactoe01/03.
+        player = 1 for X, -1 for O. This is the current player, i.e. the one
+        who gets the next move.
+        """
+
+        # Initialize
+        if board is None:
+            x, o = 0, 0
+            player = 1
+        else:
+            x, o = self.to_bits(board)
+
+        if self.move_values is not None:
+            self.solve_bits_values(x, o, player,
+                                   ranking.rank(self.to_board(x, o)))
+        else:
+            self.solve_bits(x, o, player)
+
+
+    def solve_bits(self, x, o, player):
+        """Recursively fill in table for the board given by bitboards x and o.
+
+        Returns the value of the board to player.
+        """
+        key = x | (o << self.SIZE)
+        if key in self.table:
+            return self.table[key][1]
+
+        win = self.check_win_bits(x, o, player)
+        # If win/loss/draw has been determined, the game is over.
+        if win is not None:
+            win = self.score(x, o, win)
+            self.table[key] = (None, win) # None => no move needed
+            return win
+
+        # If we don't know the best response yet, compute it.
+        # Squares are visited in increasing order, as in tictactoe01.
+        best_value = -self.SIZE - 2 # less than any value
+        empty = self.FULL & ~(x | o)
+        while empty:
+            bit = empty & -empty # lowest empty square
+            empty ^= bit
+            if player == 1:
+                value = -self.solve_bits(x | bit, o, -1)
+            else:
+                value = -self.solve_bits(x, o | bit, 1)
+            if value > best_value:
+                best_value, best_move = value, bit
+        best_move = best_move.bit_length() - 1
+        self.table[key] = (best_move, best_value)
+        return best_value
+
+
+    def solve_bits_values(self, x, o, player, r):
+        """Same as solve_bits, but also add the values of all moves from each
+        board to move_values. r is the rank of the board x, o.
+        """
+        key = x | (o << self.SIZE)
+        if key in self.table:
+            return self.table[key][1]
+
+        win = self.check_win_bits(x, o, player)
+        if win is not None:
+            win = self.score(x, o, win)
+            self.table[key] = (None, win)
+            self.move_values.add(r, 0) # no moves
+            return win
+
+        best_value = -self.SIZE - 2
+        packed = 0
+        empty = self.FULL & ~(x | o)
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            i = bit.bit_length() - 1
+            if player == 1:
+                value = -self.solve_bits_values(x | bit, o, -1,
+                                                r + self.powers[i])
+            else:
+                value = -self.solve_bits_values(x, o | bit, 1,
+                                                r - self.powers[i])
+            packed |= (cmp(value, 0) + 2) << 2 * i
+            if value > best_value:
+                best_value, best_move = value, i
+        self.table[key] = (best_move, best_value)
+        self.move_values.add(r, packed)
+        return best_value
+
+
+    def get_move_values(self, board):
+        """Return a list of the values of moving to each square of board, for
+        the player whose turn it is, with None for squares that are taken.
+
+        Needs move_values=True and build_best_responses, and raises KeyError
+        if board is not in best_responses.
+        """
+        return self.move_values[ranking.rank(board)]
+
+
+    def solve(self, board, player=None):
+        """Return the best response (move, value) to a single board.
+
+        Unlike build_best_responses, this does not visit every board that
+        could follow, so it is usable for WIDTH = 4. The value is the same
+        as in best_responses, but move may be a different, equally good move.
+
+        If player is None, it is inferred from the board assuming X went first.
+        """
+        x, o = self.to_bits(board)
+        if player is None:
+            player = self.next_player(x, o)
+
+        win = self.check_win_bits(x, o, player)
+        if win is not None:
+            return (None, self.score(x, o, win))
+
+        if self.tt is None:
+            self.tt = [None] * self.tt_size
+
+        # The value of a board only depends on whose pieces are whose,
+        # so the search is done from the point of view of the mover.
+        me, opp = (x, o) if player == 1 else (o, x)
+        # Deep enough that the game is over before search has to estimate
+        empties = bin(self.FULL & ~(x | o)).count('1')
+        bound = WIN_SCORE + self.SIZE + 1 if self.depth_aware else WIN_SCORE
+        value, move = self.search(me, opp, -bound, bound, empties)
+        return (move.bit_length() - 1, self.proven_value(value))
+
+
+    def depth_to_mate(self, board, player=None):
+        """Return the number of moves left before the game on board is won,
+        with best play on both sides, or None if it will be a draw.
+
+        Requires depth_aware. Uses solve, so board need not be in the table.
+        """
+        if not self.depth_aware:
+            raise ValueError("depth_to_mate requires depth_aware=True")
+        value = self.solve(board, player)[1]
+        if value == 0:
+            return None
+        return board.count(0) + 1 - abs(value)
+
+
+    def score(self, x, o, outcome):
+        """Return the value of the finished game x, o with the given outcome
+        (as returned by check_win_bits), scaled by how soon it ended if
+        depth_aware."""
+        if self.depth_aware and outcome:
+            return outcome * (bin(self.FULL & ~(x | o)).count('1') + 1)
+        return outcome
+
+
+    def proven_value(self, value):
+        """Return a value from search that is a win, loss or draw as the
+        value solve gives, i.e. +1/-1/0, scaled by how soon if depth_aware."""
+        if abs(value) < WIN_SCORE:
+            return value
+        return cmp(value, 0) * (abs(value) - WIN_SCORE if self.depth_aware else 1)
+
+
+    def forced_move(self, me, opp, empty):
+        """Return (outcome, bit) for the board where me are the bits of the
+        player to move, opp those of the other player, and empty the empty
+        squares, from the threats to complete a line:
+            * (1, bit) if the player to move wins now by moving to bit.
+            * (-1, bit) if the other player has two threats, so the game is
+              lost, whether bit blocks one of them or not.
+            * (None, bit) if bit must be played to block the one threat.
+            * (None, None) if there are no threats.
+        """
+        threats = self.threats(me, empty)
+        if threats:
+            return 1, threats & -threats
+        threats = self.threats(opp, empty)
+        if threats:
+            if threats & (threats - 1):
+                return -1, threats & -threats
+            return None, threats
+        return None, None
+
+
+    def solve_pn(self, board, player=None):
+        """Return the best response (move, value) to a single board, like
+        solve, but found by proof-number search. value is +1/-1/0.
+
+        The move wins if the board is a win, and draws if it is a draw. If
+        the board is lost, it is any move.
+
+        If player is None, it is inferred from the board assuming X went first.
+        """
+        if self.depth_aware:
+            raise ValueError("solve_pn does not support depth_aware")
+        x, o = self.to_bits(board)
+        if player is None:
+            player = self.next_player(x, o)
+
+        win = self.check_win_bits(x, o, player)
+        if win is not None:
+            return (None, win)
+
+        if self.pn_table is None:
+            self.pn_table = [None] * self.pn_size
+
+        me, opp = (x, o) if player == 1 else (o, x)
+        # First try to prove a win, then a draw. When attacking, the player
+        # to move needs a win; otherwise a draw will do.
+        for value, attacking in [(1, True), (0, False)]:
+            bit = self.prove(me, opp, attacking)
+            if bit is not None:
+                return (bit.bit_length() - 1, value)
+
+        # Lost anyway
+        empty = self.FULL & ~(me | opp)
+        bit = next(b for b in self.move_order if b & empty)
+        return (bit.bit_length() - 1, -1)
+
+
+    def prove(self, me, opp, attacking):
+        """If the player to move, whose bits are me, can win, or, if not
+        attacking, at least draw, return the bit of a move that does it.
+        Otherwise return None."""
+        phi, delta = self.pn_search(me, opp, attacking, INFINITY, INFINITY)
+        if phi:
+            return None
+        # The board itself is the last one stored, so it is still there.
+        key = me | (opp << self.SIZE) | (attacking << 2 * self.SIZE)
+        return self.pn_table[key % self.pn_size][3]
+
+
+    def pn_search(self, me, opp, attacking, phi_limit, delta_limit):
+        """Expand the board until its proof number phi reaches phi_limit or
+        its disproof number delta reaches delta_limit, and return (phi, delta).
+
+        phi and delta are for the player to move getting a win if attacking,
+        or at least a draw if not. That is, phi is 0 if they can, and delta
+        is 0 if they can't. Once phi is 0, the move that proves it is stored
+        with them in pn_table.
+        """
+        empty = self.FULL & ~(me | opp)
+        outcome, forced = self.forced_move(me, opp, empty)
+        if outcome == 1:
+            return self.pn_store(me, opp, attacking, 0, INFINITY, forced)
+        if not empty:
+            # A draw
+            if attacking:
+                return self.pn_store(me, opp, attacking, INFINITY, 0)
+            return self.pn_store(me, opp, attacking, 0, INFINITY)
+        if outcome == -1:
+            return self.pn_store(me, opp, attacking, INFINITY, 0)
+
+        if forced:
+            moves = [forced]
+        else:
+            moves = [bit for bit in self.move_order if bit & empty]
+
+        self.pn_nodes += 1
+        children = [(opp, me | bit) for bit in moves]
+        # The children's (phi, delta), kept here as well as in pn_table, so
+        # the search still makes progress if they are pushed out of it.
+        numbers = [self.pn_lookup(opp2, me2, not attacking)
+                   for opp2, me2 in children]
+        while True:
+            # phi is the easiest child to disprove, delta all of them.
+            phi, delta = INFINITY, 0
+            second = INFINITY
+            for i, (phi2, delta2) in enumerate(numbers):
+                delta = min(delta + phi2, INFINITY)
+                if delta2 < phi:
+                    second, phi = phi, delta2
+                    best = i
+                elif delta2 < second:
+                    second = delta2
+
+            if phi >= phi_limit or delta >= delta_limit:
+                # If phi is 0, the best child is disproved, and so is the
+                # other player's hope after that move.
+                return self.pn_store(me, opp, attacking, phi, delta,
+                                     moves[best] if phi == 0 else None)
+
+            opp2, me2 = children[best]
+            phi2 = numbers[best][0]
+            numbers[best] = self.pn_search(
+                opp2, me2, not attacking,
+                min(delta_limit - delta + phi2, INFINITY),
+                min(phi_limit, second + 1))
+
+
+    def pn_lookup(self, me, opp, attacking):
+        "Return (phi, delta) for a board from pn_table, or (1, 1) if not there."
+        key = me | (opp << self.SIZE) | (attacking << 2 * self.SIZE)
+        entry = self.pn_table[key % self.pn_size]
+        if entry is not None and entry[0] == key:
+            return entry[1], entry[2]
+        return 1, 1
+
+
+    def pn_store(self, me, opp, attacking, phi, delta, move=None):
+        """Store (phi, delta) for a board in pn_table, along with the move
+        that proves it, if any, and return them."""
+        key = me | (opp << self.SIZE) | (attacking << 2 * self.SIZE)
+        self.pn_table[key % self.pn_size] = (key, phi, delta, move)
+        return phi, delta
+
+
+    def best_move(self, board, deadline, player=None, timer=default_timer):
+        """Return (move, value, depth, exact) for board, searching by
+        iterative deepening until the time deadline, as read from timer.
+
+        Each iteration searches one ply deeper than the last, and scores the
+        boards where it stops with evaluate. The answer is from the deepest
+        iteration that finished in time, and depth is how many plies it
+        searched. The first ply is always searched, even if the deadline has
+        passed, so there is always a move.
+
+        exact is True if the value is proven, in which case it is the same
+        as the value from solve. Otherwise value is an estimate between -1
+        and 1, as in mcts.py.
+
+        If player is None, it is inferred from the board assuming X went first.
+        """
+        x, o = self.to_bits(board)
+        if player is None:
+            player = self.next_player(x, o)
+
+        win = self.check_win_bits(x, o, player)
+        if win is not None:
+            return (None, self.score(x, o, win), 0, True)
+
+        if self.tt is None:
+            self.tt = [None] * self.tt_size
+
+        me, opp = (x, o) if player == 1 else (o, x)
+        empties = bin(self.FULL & ~(x | o)).count('1')
+        bound = WIN_SCORE + self.SIZE + 1
+        self.timer = timer
+        for depth in range(1, empties + 1):
+            self.deadline = deadline if depth > 1 else None
+            try:
+                value, move = self.search(me, opp, -bound, bound, depth)
+            except SearchTimeout:
+                break
+            result = (move.bit_length() - 1, value, depth)
+            # Past the last empty square nothing is left to estimate.
+            exact = abs(value) >= WIN_SCORE or depth == empties
+            if exact or timer() >= deadline:
+                break
+        self.deadline = None
+        self.timer = default_timer
+
+        move, value, depth = result
+        if not exact:
+            return (move, float(value) / self.max_estimate, depth, False)
+        return (move, self.proven_value(value), depth, True)
+
+
+    def search(self, me, opp, alpha, beta, depth):
+        """Alpha-beta search of the board where me are the bits of the
+        player to move and opp those of the other player, depth plies deep,
+        below which boards are scored by evaluate. Wins and losses are
+        scored beyond any estimate, as +/-WIN_SCORE, plus how soon they
+        happen if depth_aware.
+
+        Returns (value, move), where move is a single bit, or None if the
+        board is a draw or at depth 0. Assumes that neither player has
+        already won.
+
+        Entries in tt are kept between searches, and between calls to
+        solve and best_move. Raises SearchTimeout once past the deadline.
+        """
+        self.search_nodes += 1
+        if (self.deadline is not None and
+            self.search_nodes % CLOCK_NODES == 0 and
+            self.timer() >= self.deadline):
+            raise SearchTimeout()
+
+        empty = self.FULL & ~(me | opp)
+        if not empty:
+            return 0, None # draw
+
+        # Win now if we can, and lose if the opponent has two threats.
+        outcome, forced = self.forced_move(me, opp, empty)
+        if outcome is not None:
+            if self.depth_aware:
+                # A loss comes on the move after our block.
+                e = bin(empty).count('1') - (outcome == -1)
+                return outcome * (WIN_SCORE + e), forced
+            return outcome * WIN_SCORE, forced
+        moves = [forced] if forced else None
+
+        if depth == 0:
+            return self.evaluate(me, opp), None
+
+        key = me | (opp << self.SIZE)
+        slot = key % self.tt_size
+        entry = self.tt[slot]
+        tt_move = None
+        if entry is not None and entry[0] == key:
+            _, flag, value, tt_move, entry_depth = entry
+            # A shallower search is still good for the move order, and for
+            # the value if it was proven.
+            if entry_depth >= depth or (flag == EXACT and abs(value) >= WIN_SCORE):
+                if flag == EXACT:
+                    return value, tt_move
+                elif flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value, tt_move
+
+        if moves is None:
+            moves = [bit for bit in self.move_order if bit & empty]
+            if tt_move is not None:
+                moves.remove(tt_move)
+                moves.insert(0, tt_move)
+
+        alpha0 = alpha
+        best_value = -WIN_SCORE - self.SIZE - 2
+        for bit in moves:
+            value = -self.search(opp, me | bit, -beta, -alpha, depth - 1)[0]
+            if value > best_value:
+                best_value, best_move = value, bit
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best_value <= alpha0:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+
+        if entry is None or entry[4] <= depth:
+            self.tt[slot] = (key, flag, best_value, best_move, depth)
+
+        return best_value, best_move
+
+
+    def evaluate(self, me, opp):
+        """Return an estimate of the value of a board to the player to move,
+        whose bits are me: each line still open to one player counts one
+        for each of their pieces in it, for them.
+        """
+        value = 0
+        for mask in self.win_masks:
+            if not mask & opp:
+                value += bin(mask & me).count('1')
+            elif not mask & me:
+                value -= bin(mask & opp).count('1')
+        return value
+
+
+    def threats(self, me, empty):
+        "Return the bits of the empty squares that would complete a line for me."
+        squares = 0
+        for mask in self.win_masks:
+            rest = mask & ~me
+            if rest & empty == rest and rest & (rest - 1) == 0:
+                squares |= rest
+        return squares
+
+
+    def next_player(self, x, o):
+        "Return the player to move, assuming X went first."
+        if bin(x).count('1') == bin(o).count('1'):
+            return 1
+        else:
+            return -1
+
+
+    def build_best_responses_parallel(self, plies=1, workers=None):
+        """Same as build_best_responses() with no arguments, using a pool of
+        worker processes for all but the first plies of the game.
+
+        workers is the number of processes, by default one per CPU.
+        """
+        # Boards after the first plies, one per class of equivalent boards
+        frontier = set([(0, 0)])
+        player = 1
+        for _ in range(plies):
+            frontier2 = set()
+            for x, o in frontier:
+                if self.check_win_bits(x, o, player) is not None:
+                    continue
+                empty = self.FULL & ~(x | o)
+                while empty:
+                    bit = empty & -empty
+                    empty ^= bit
+                    if player == 1:
+                        frontier2.add(self.canonical_bits(x | bit, o))
+                    else:
+                        frontier2.add(self.canonical_bits(x, o | bit))
+            frontier = frontier2
+            player = -1 * player
+        # Boards where the game is already over are left for the end.
+        frontier = [(x, o) for x, o in frontier
+                    if self.check_win_bits(x, o, player) is None]
+
+        # {key: value << SIZE | moves}, as returned by solve_subtree
+        solved = {}
+        pool = multiprocessing.Pool(workers)
+        try:
+            for keys, responses in pool.imap_unordered(
+                    solve_subtree, [(self.WIDTH, x, o, player,
+                                     self.depth_aware)
+                                    for x, o in sorted(frontier)]):
+                # The subtrees overlap, and each board is kept only once.
+                for key, response in itertools.izip(keys, responses):
+                    if key not in solved:
+                        solved[key] = response
+                        moves = response & self.FULL
+                        move = (moves & -moves).bit_length() - 1 if moves else None
+                        self.table[key] = (move, response >> self.SIZE)
+        finally:
+            pool.close()
+            pool.join()
+
+        # Every other board after the first plies is under a board
+        # equivalent to one in the frontier, at the same place in its subtree.
+        moved = [{} for _ in range(self.NUM_SYMMETRIES)]
+        for x, o in frontier:
+            images = set([(x, o)])
+            for t in range(self.NUM_SYMMETRIES):
+                image = (self.transform_bits(x, t), self.transform_bits(o, t))
+                if image not in images:
+                    images.add(image)
+                    self.expand_bits(x, o, player, t, solved, moved[t])
+
+        # Only the first plies are left to solve.
+        self.solve_bits(0, 0, 1)
+
+
+    def solve_bits_all(self, x, o, player, solved):
+        """Like solve_bits, but record the value and all best moves of each
+        board in solved, as {key: (value, moves)}, where moves has a bit set
+        for each best move.
+
+        Returns the value of the board to player.
+        """
+        key = x | (o << self.SIZE)
+        if key in solved:
+            return solved[key][0]
+
+        win = self.check_win_bits(x, o, player)
+        if win is not None:
+            win = self.score(x, o, win)
+            solved[key] = (win, 0)
+            return win
+
+        best_value = -self.SIZE - 2
+        empty = self.FULL & ~(x | o)
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            if player == 1:
+                value = -self.solve_bits_all(x | bit, o, -1, solved)
+            else:
+                value = -self.solve_bits_all(x, o | bit, 1, solved)
+            if value > best_value:
+                best_value, best_moves = value, bit
+            elif value == best_value:
+                best_moves |= bit
+        solved[key] = (best_value, best_moves)
+        return best_value
+
+
+    def expand_bits(self, x, o, player, t, solved, moved):
+        """Add to table the board x, o moved by symmetry t, and every board
+        under it likewise, taking values and sets of best moves from solved,
+        as packed by solve_subtree. moved caches transform_bits for t.
+
+        A board already in table is skipped, along with its subtree, which
+        is in table already as well.
+        """
+        for bits in (x, o):
+            if bits not in moved:
+                moved[bits] = self.transform_bits(bits, t)
+        key = moved[x] | moved[o] << self.SIZE
+        if key in self.table:
+            return
+
+        response = solved[x | (o << self.SIZE)]
+        moves = response & self.FULL
+        if moves not in moved:
+            moved[moves] = self.transform_bits(moves, t)
+        mask = moved[moves]
+        move = (mask & -mask).bit_length() - 1 if mask else None
+        self.table[key] = (move, response >> self.SIZE)
+        if not moves: # the game is over
+            return
+
+        empty = self.FULL & ~(x | o)
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            if player == 1:
+                self.expand_bits(x | bit, o, -1, t, solved, moved)
+            else:
+                self.expand_bits(x, o | bit, 1, t, solved, moved)
+
+
+    def transform_bits(self, bits, t):
+        "Return the bitboard bits moved by symmetry number t."
+        if self.bit_perm_tables is None:
+            self.bit_perm_tables = self.build_bit_perm_tables()
+        result = 0
+        for table in self.bit_perm_tables[t]:
+            result |= table[bits & 255]
+            bits >>= 8
+        return result
+
+
+    def canonical_bits(self, x, o):
+        """Return a representative (x, o) of the class of boards equivalent
+        to x, o, the same for every board in the class."""
+        return min((self.transform_bits(x, t), self.transform_bits(o, t))
+                   for t in range(self.NUM_SYMMETRIES))
+
+
+    def check_win_bits(self, x, o, player):
+        """Evaluate the bitboards x, o to determine if there is a winner.
+
+        Returns 1 if player wins, 0 if draw, -1 if loses, and None if no winner
+        is yet determined.
+        """
+        for mask in self.win_masks:
+            if x & mask == mask:
+                return player
+            if o & mask == mask:
+                return -player
+
+        if x | o == self.FULL:
+            return 0 # draw
+        else: return None # game not over yet
+
+
+    def check_win(self, board, player):
+        "Same as check_win_bits, but for a flat board tuple."
+        x, o = self.to_bits(board)
+        return self.check_win_bits(x, o, player)
+
+
+    def to_bits(self, board):
+        "Convert a flat board tuple to bitboards (x, o)."
+        x, o = 0, 0
+        for i, val in enumerate(board):
+            if val == 1:
+                x |= 1 << i
+            elif val == -1:
+                o |= 1 << i
+        return x, o
+
+    def to_board(self, x, o):
+        "Convert bitboards (x, o) to a flat board tuple."
+        return tuple(1 if x >> i & 1 else -1 if o >> i & 1 else 0
+                     for i in range(self.SIZE))
+
+    def to_key(self, board):
+        "Return the table key of a flat board tuple."
+        x, o = self.to_bits(board)
+        return x | (o << self.SIZE)
+
+    def from_key(self, key):
+        "Return the flat board tuple for a table key."
+        return self.to_board(key & self.FULL, key >> self.SIZE)
+
+
+
+def solve_subtree(args):
+    """Worker for build_best_responses_parallel.
+
+    args = (WIDTH, x, o, player, depth_aware) gives a board to solve.
+    Returns two arrays, keys and responses, for every board under it:
+    the table key of each board, and value << SIZE | moves, where moves
+    has a bit set for each best move. Keys must fit in an unsigned long,
+    which they do up to WIDTH = 4.
+    """
+    WIDTH, x, o, player, depth_aware = args
+    game = TicTacToe(WIDTH, depth_aware=depth_aware)
+    solved = {}
+    game.solve_bits_all(x, o, player, solved)
+
+    keys = array.array('L', solved.iterkeys())
+    responses = array.array('l', (value << game.SIZE | moves
+                                  for value, moves in solved.itervalues()))
+    return keys, responses
+
+
+
+class BoardTable(collections.Mapping):
+    """Read-only view of a bitboard table, keyed by flat board tuples.
+
+    Conversion to and from tuples only happens on access, so the solver
+    itself never builds a tuple. As a collections.Mapping, it has all the
+    read methods of a dict, and compares equal to a dict with the same items.
+    """
+
+    def __init__(self, game):
+        self.game = game
+
+    def __getitem__(self, board):
+        return self.game.table[self.game.to_key(board)]
+
+    def __contains__(self, board):
+        return self.game.to_key(board) in self.game.table
+
+    def __len__(self):
+        return len(self.game.table)
+
+    def __iter__(self):
+        return (self.game.from_key(key) for key in self.game.table)
+
+    def get(self, board, default=None):
+        return self.game.table.get(self.game.to_key(board), default)
+
+    def iteritems(self):
+        return ((self.game.from_key(key), response)
+                for key, response in self.game.table.iteritems())
+
+    def items(self):
+        return list(self.iteritems())
+
+
+
+# Some sample tests, not very high coverage.
+class TestTicTacToe():
+
+    def test(self):
+        print "\n---RUNNING TESTS---\n"
+
+        self.test_bits()
+        self.test_check_win()
+        self.test_build_best_responses()
+        self.test_matches_tuple_engine()
+        self.test_solve()
+        self.test_build_best_responses_parallel()
+        self.test_depth_aware()
+        self.test_move_values()
+        self.test_solve_pn()
+        self.test_best_move()
+
+        print "\n---ALL TESTS PASS---\n"
+
+
+    def test_bits(self):
+
+        game = TicTacToe()
+
+        b = (1,-1,0, 0,1,0, -1,0,0)
+        x, o = game.to_bits(b)
+        assert x == 0b000010001
+        assert o == 0b001000010
+        assert game.to_board(x, o) == b
+        assert game.from_key(game.to_key(b)) == b
+
+        assert len(game.win_masks) == 2 * game.WIDTH + game.NUM_DIAGS
+
+        print '\t* test_bits passes'
+
+
+    def test_check_win(self):
+
+        game = TicTacToe()
+
+        assert game.check_win((0,0,0, 0,0,0, 0,0,0), -1) is None
+        assert game.check_win((1,1,-1, 0,0,0, 0,0,0), -1) is None
+
+        assert game.check_win((1,-1,-1, 0,1,0, 0,0,1), -1) == -1
+        assert game.check_win((1,1,1, 0,0,0, -1,-1,0), -1) == -1
+
+        assert game.check_win((1,1,-1, 1,0,-1, 0,0,-1), 1) == -1
+        assert game.check_win((1,1,1, -1,0,-1, 0,0,-1), 1) == 1
+
+        assert game.check_win((1,1,-1, -1,-1,1, 1,1,-1), 1) == 0
+
+        print '\t* test_check_win passes'
+
+
+    def test_build_best_responses(self):
+
+        game = TicTacToe()
+        game.build_best_responses()
+
+        assert game.best_responses[(1,-1,1, -1,1,-1, 1,-1,1)] == (None, -1)
+        assert game.best_responses[(1,1,-1, -1,-1,1, 1,1,-1)] == (None, 0)
+        assert game.best_responses[(1,-1,1, -1,1,1, -1,-1,0)] == (8,1)
+        assert game.best_responses[(1,1,0, 0,-1,-1, 0,0,0)] == (2, 1)
+        assert game.best_responses[(1,0,0, 1,-1,-1, 0,0,0)][1] == 1
+        assert (0,) * 9 in game.best_responses
+
+        # There are 5478 possible board states.
+        assert len(game.best_responses) == 5478
+
+        print '\t* test_build_best_responses passes'
+
+
+    def test_matches_tuple_engine(self):
+
+        import tictactoe01
+
+        game = TicTacToe()
+        game.build_best_responses()
+        game01 = tictactoe01.TicTacToe()
+        game01.build_best_responses()
+
+        assert dict(game.best_responses.items()) == game01.best_responses
+        assert game.best_responses == game01.best_responses
+
+        # The view goes wherever a best_responses dict does.
+        dense = ranking.DenseTable(9)
+        dense.update(game.best_responses)
+        assert len(dense) == 5478
+        for board, response in game01.best_responses.iteritems():
+            assert dense[ranking.rank(board)] == response
+
+        print '\t* test_matches_tuple_engine passes'
+
+
+    def test_solve(self):
+
+        game = TicTacToe()
+        game.build_best_responses()
+
+        assert game.solve((1,1,0, 0,-1,-1, 0,0,0)) == (2, 1)
+        assert game.solve((1,-1,1, -1,1,-1, 1,-1,1)) == (None, -1)
+        assert game.solve((0,0,0, 0,0,0, 0,0,0))[1] == 0
+
+        # solve agrees with the full table on the value of every board,
+        # and the move it picks is as good as the one in the table.
+        for board, (move, value) in game.best_responses.items():
+            move2, value2 = game.solve(board)
+            assert value2 == value
+            if move is not None:
+                player = game.next_player(*game.to_bits(board))
+                board2 = board[:move2] + (player,) + board[move2+1:]
+                assert board[move2] == 0
+                assert -game.best_responses[board2][1] == value
+
+        # A mid-game 4x4 query, without building the whole table.
+        game = TicTacToe(4)
+        assert game.solve((1,0,0,0, 0,-1,0,0, 0,0,0,0, 0,0,0,0))[1] == 0
+        assert game.solve((1,1,1,0, -1,-1,-1,0, 0,0,0,0, 0,0,0,0)) == (3, 1)
+        assert len(game.table) == 0
+
+        # Win now, lost to two threats, must block, or free to move.
+        game = TicTacToe()
+        for board, forced in [((1,1,0, -1,-1,0, 0,0,0), (1, 1 << 2)),
+                              ((-1,1,0, -1,-1,0, 0,0,1), (-1, 1 << 5)),
+                              ((0,0,0, -1,-1,0, 1,0,0), (None, 1 << 5)),
+                              ((1,0,0, 0,-1,0, 0,0,0), (None, None))]:
+            x, o = game.to_bits(board)
+            assert game.forced_move(x, o, game.FULL & ~(x | o)) == forced
+
+        print '\t* test_solve passes'
+
+
+    def test_build_best_responses_parallel(self):
+
+        game = TicTacToe()
+        game.build_best_responses()
+
+        for plies in [0, 1, 2]:
+            game2 = TicTacToe()
+            game2.build_best_responses_parallel(plies, workers=2)
+            assert game2.table == game.table
+
+        x, o = game.to_bits((1,1,0, 0,-1,0, 0,0,0))
+        x2, o2 = game.to_bits((0,0,0, 0,-1,1, 0,0,1))
+        assert game.canonical_bits(x, o) == game.canonical_bits(x2, o2)
+
+        game2 = TicTacToe(depth_aware=True)
+        game2.build_best_responses_parallel(1, workers=2)
+        game3 = TicTacToe(depth_aware=True)
+        game3.build_best_responses()
+        assert game2.table == game3.table
+
+        # A worker only returns the boards under its own board, each once,
+        # with the serial table's value and move among its best moves.
+        keys, responses = solve_subtree((3, 1, 0, -1, False))
+        assert len(set(keys)) == len(keys) == 1870
+        for key, response in zip(keys, responses):
+            x, o = key & game.FULL, key >> game.SIZE
+            assert x & 1 and bin(x).count('1') - bin(o).count('1') in (0, 1)
+            move, value = game.table[key]
+            assert response >> game.SIZE == value
+            assert response & game.FULL == 0 if move is None else \
+                response >> move & 1
+
+        # The symmetry tables are only built when they are needed.
+        game = TicTacToe()
+        game.solve((0,) * 9)
+        assert game.bit_perm_tables is None
+
+        print '\t* test_build_best_responses_parallel passes'
+
+
+    def test_depth_aware(self):
+
+        game03 = tictactoe03.TicTacToe(depth_aware=True)
+        game03.build_best_responses()
+
+        game = TicTacToe(depth_aware=True)
+        game.build_best_responses()
+        for board, (move, value) in game.best_responses.items():
+            assert game03.best_responses[board][1] == value
+
+        game2 = TicTacToe(depth_aware=True)
+        game2.build_best_responses_parallel(1, workers=2)
+        assert game2.table == game.table
+
+        # solve finds the same values, so it also takes the quickest win.
+        for board, (move, value) in game.best_responses.items():
+            assert game.solve(board)[1] == value
+        assert game.solve((1,0,0, 1,-1,-1, 0,0,0)) == (6, 5)
+        assert game.depth_to_mate((1,-1,0, 0,1,0, 0,0,0)) == 4
+
+        game = TicTacToe(4, depth_aware=True)
+        assert game.solve((1,1,1,0, -1,-1,-1,0, 0,0,0,0, 0,0,0,0)) == (3, 10)
+        assert game.depth_to_mate((1,1,1,0, -1,-1,-1,0, 0,0,0,0, 0,0,0,0)) == 1
+
+        print '\t* test_depth_aware passes'
+
+
+    def test_move_values(self):
+
+        game = TicTacToe(move_values=True)
+        game.build_best_responses()
+        assert len(game.move_values) == 5478
+
+        # The table is the same as without move_values.
+        game2 = TicTacToe()
+        game2.build_best_responses()
+        assert game.table == game2.table
+
+        assert game.get_move_values((1,0,0, 1,-1,-1, 0,0,0)) == \
+            [None, 1, 1, None, None, None, 1, 0, 0]
+        assert game.get_move_values((1,-1,1, -1,1,-1, 1,-1,1)) == [None] * 9
+
+        # Every move has the value of the board it leads to, and the best
+        # move in the table is the first with the best value.
+        for board, (move, value) in game.best_responses.items():
+            values = game.get_move_values(board)
+            if move is None:
+                assert values == [None] * 9
+                continue
+            player = game.next_player(*game.to_bits(board))
+            for i, value2 in enumerate(values):
+                if board[i] != 0:
+                    assert value2 is None
+                else:
+                    board2 = board[:i] + (player,) + board[i+1:]
+                    assert value2 == -game.best_responses[board2][1]
+            assert values.index(max(values)) == move
+
+        print '\t* test_move_values passes'
+
+
+    def test_solve_pn(self):
+
+        game = TicTacToe()
+        game.build_best_responses()
+
+        assert game.solve_pn((1,1,0, 0,-1,-1, 0,0,0)) == (2, 1)
+        assert game.solve_pn((1,-1,1, -1,1,-1, 1,-1,1)) == (None, -1)
+        assert game.solve_pn((0,0,0, 0,0,0, 0,0,0))[1] == 0
+
+        # The same values as the full table, and moves that keep them.
+        for board, (move, value) in game.best_responses.items():
+            move2, value2 = game.solve_pn(board)
+            assert value2 == value
+            if move is not None and value > -1:
+                player = game.next_player(*game.to_bits(board))
+                board2 = board[:move2] + (player,) + board[move2+1:]
+                assert -game.best_responses[board2][1] == value
+
+        # A tiny table still works, just with more searching.
+        game2 = TicTacToe(pn_size=7)
+        for board in [(0,0,0, 0,0,0, 0,0,0), (1,0,0, 0,-1,0, 0,0,1),
+                      (1,-1,0, 0,1,0, 0,0,0)]:
+            assert game2.solve_pn(board)[1] == game.best_responses[board][1]
+
+        # 4x4 boards with forced lines
+        game = TicTacToe(4)
+        assert game.solve_pn((1,1,1,0, -1,-1,-1,0, 0,0,0,0, 0,0,0,0)) == (3, 1)
+        board = (1,1,0,0, -1,-1,0,0, 1,0,0,0, -1,0,0,0)
+        assert game.solve_pn(board)[1] == game.solve(board)[1]
+
+        print '\t* test_solve_pn passes'
+
+
+    def test_best_move(self):
+
+        game = TicTacToe()
+        game.build_best_responses()
+        deadline = default_timer() + 60
+
+        assert game.best_move((1,1,0, 0,-1,-1, 0,0,0), deadline) == (2, 1, 1, True)
+        assert game.best_move((1,-1,1, -1,1,-1, 1,-1,1), deadline) == (None, -1, 0, True)
+
+        # With time to spare, the same values as the full table.
+        for board, (move, value) in game.best_responses.items():
+            move2, value2, depth, exact = game.best_move(board, deadline)
+            assert exact and value2 == value
+            if move is not None:
+                player = game.next_player(*game.to_bits(board))
+                board2 = board[:move2] + (player,) + board[move2+1:]
+                assert -game.best_responses[board2][1] == value
+
+        game = TicTacToe(depth_aware=True)
+        board = (1,0,0, 0,-1,0, 0,0,1)
+        assert game.best_move(board, deadline)[1] == game.solve(board)[1]
+
+        # Out of time: the empty 4x4 board can't be finished, but there is
+        # still a move. The clock here ticks once each time it is read, so
+        # the search runs out of time at the same point on any machine.
+        game = TicTacToe(4)
+        clock = [0]
+        def ticks():
+            clock[0] += 1
+            return clock[0]
+        move, value, depth, exact = game.best_move((0,) * 16, 20, timer=ticks)
+        assert clock[0] >= 20
+        assert 0 <= move < 16 and -1 < value < 1
+        assert 1 < depth < 16 and not exact
+        assert game.timer is default_timer
+
+        # With boards searched as the clock, the search stops within
+        # CLOCK_NODES boards of the deadline.
+        for WIDTH, deadline in [(4, 5000), (5, 2000), (5, 20000)]:
+            game = TicTacToe(WIDTH)
+            game.best_move((0,) * WIDTH**2, deadline,
+                           timer=lambda: game.search_nodes)
+            assert deadline <= game.search_nodes <= deadline + CLOCK_NODES
+
+        # Past the deadline, search gives up, and best_move only does the
+        # first ply.
+        game = TicTacToe(4)
+        game.deadline = default_timer() - 1
+        game.search_nodes = CLOCK_NODES - 1
+        game.tt = [None] * game.tt_size
+        try:
+            game.search(0, 0, -WIN_SCORE, WIN_SCORE, 3)
+            assert False
+        except SearchTimeout:
+            pass
+        move, value, depth, exact = game.best_move((0,) * 16, default_timer() - 1)
+        assert 0 <= move < 16 and depth == 1 and not exact
+
+        # A forced win is proven well before the end of the game.
+        board = (0,-1,0,0, 1,-1,0,0, 0,1,0,0, 1,-1,1,-1)
+        move, value, depth, exact = game.best_move(board, default_timer() + 60)
+        assert (value, exact) == (1, True) and depth < board.count(0)
+        assert move == game.solve(board)[0]
+
+        print '\t* test_best_move passes'
+
+
+
+if __name__ == '__main__':
+
+    tests = TestTicTacToe()
+    tests.test()
+
+    print "Timing for WIDTH = 3..."
+    tictactoe = TicTacToe(3)
+    funtime(tictactoe.build_best_responses)
+    print "Size of best_responses:", len(tictactoe.best_responses)
+
+    print "\n"
+
+    print "Timing for WIDTH = 3, with move_values..."
+    tictactoe = TicTacToe(3, move_values=True)
+    funtime(tictactoe.build_best_responses)
+    print "Size of move_values:", len(tictactoe.move_values)
+
+    print "\n"
+
+    print "Timing for WIDTH = 3, in parallel..."
+    tictactoe = TicTacToe(3)
+    funtime(tictactoe.build_best_responses_parallel, 2)
+    print "Size of best_responses:", len(tictactoe.best_responses)
+
+    # Workers only pay off with more than one CPU to run them on.
+    start = default_timer()
+    TicTacToe(3).build_best_responses()
+    serial = default_timer() - start
+    start = default_timer()
+    TicTacToe(3).build_best_responses_parallel(1)
+    parallel = default_timer() - start
+    print "Speedup over the serial build, with %d CPUs: %.2fx" % (
+        multiprocessing.cpu_count(), serial / parallel)
+
+    # With a CPU for each worker, the workers take as long as the slowest.
+    times = []
+    for x, o in [(1, 0), (2, 0), (16, 0)]:
+        start = default_timer()
+        solve_subtree((3, x, o, -1, False))
+        times.append(default_timer() - start)
+    print "Workers, one ply in: %.4f s in all, %.4f s for the slowest" % (
+        sum(times), max(times))
+
+    print "\n"
+
+    print "Timing of solve for empty board, WIDTH = 4..."
+    tictactoe = TicTacToe(4)
+    funtime(tictactoe.solve, (0,) * 16)
+    print "Value:", tictactoe.solve((0,) * 16)[1]
+
+    print "\n"
+
+    # X has a forced win here, but not an immediate one.
+    board = (0,-1,0,0, 1,-1,0,0, 0,1,0,0, 1,-1,1,-1)
+    print "Timing of solve_pn for a board with a forced win, WIDTH = 4..."
+    tictactoe = TicTacToe(4)
+    funtime(tictactoe.solve_pn, board)
+    print "Boards expanded:", tictactoe.pn_nodes
+    print "Best response:", tictactoe.solve_pn(board)
+
+    print "\n"
+
+    print "Timing of solve for the same board..."
+    tictactoe = TicTacToe(4)
+    funtime(tictactoe.solve, board)
+
+    print "\n"
+
+    print "Searches of the empty board, WIDTH = 4, by time budget..."
+    tictactoe = TicTacToe(4)
+    for seconds in [0.01, 0.1, 1.0]:
+        start = default_timer()
+        move, value, depth, exact = tictactoe.best_move(
+            (0,) * 16, start + seconds)
+        print "%5.2fs: move %d, value %.2f, depth %d, took %.3fs" % (
+            seconds, move, value, depth, default_timer() - start)
+
+    print "\n"
+
+    print "Time taken against a 20 ms budget on the empty board, by WIDTH..."
+    for WIDTH in [4, 5, 7]:
+        tictactoe = TicTacToe(WIDTH)
+        tictactoe.best_move((0,) * WIDTH**2, default_timer()) # allocate tt
+        start = default_timer()
+        tictactoe.best_move((0,) * WIDTH**2, start + 0.02)
+        print "WIDTH = %d: %.1f ms" % (WIDTH, 1000 * (default_timer() - start))
@@ -0,0 +1,318 @@
+# Find the best response to any tic-tac-toe board configuration.
+# taking a retrograde (bottom-up) approach.
+
+# This could be used as a starting point for a full game with the ability
+# to play tic-tac-toe against an intelligent computer.
+# It also serves as an example for how to find brute-force solutions for
+# more complex games where straightforward logic would not be possible.
+
+# The earlier versions solve the game by recursion, which at larger WIDTH
+# gets close to Python's recursion limit, and spends most of its time on
+# function calls and checking whether a board is already in best_responses.
+# This version has no recursion at all. It first enumerates the reachable
+# boards layer by layer, where layer k holds the boards with k pieces placed.
+# Then it works back up from the last layer to the empty board: every board
+# in layer k is resolved from the values of its children in layer k+1.
+
+# Each layer is held as a NumPy array of boards, so checking for wins and
+# looking up the values of children are done for a whole layer at a time.
+# The boards of a layer are sorted by their base 3 key (see batch.py),
+# so the child of a board can be found with a binary search.
+
+# The result is the same best_responses dictionary as in tictactoe01.
+# Time and memory used by each layer are recorded in layer_stats.
+
+
+from timeit import default_timer
+
+import numpy as np
+
+import batch
+from benchmark import funtime
+
+
+# Marks a board whose game is not over yet (see outcomes)
+NOT_OVER = -2
+
+
+class TicTacToe():
+    """Implements the basic components of a tic-tac-toe solver.
+
+    best_responses is exactly as in tictactoe01: a dictionary where:
+        * each key represents a board, e.g. key = (-1, 0, 0, 1, 1, 0, 0, 0, 0),
+          where key[0:3] is the first row, and so forth.
+          1, -1, and 0 represent an X, an O, and unfilled square respectively.
+        * each value is a tuple, (move, value), where:
+            * move: an int in range(SIZE) indicating where the player should
+                move, or None if there is nowhere left to go.
+            * value: the value of that move to the player who makes it.
+                value = +1/-1/0 for a win/loss/draw, respectively.
+
+    layer_stats has one dictionary per layer of the last solve, with
+        * pieces: the number of pieces placed on boards in the layer.
+        * boards: the number of boards in the layer.
+        * terminal: how many of them are finished games.
+        * nbytes: memory taken by the boards of the layer.
+        * forward_time, backward_time: time spent enumerating and resolving
+          the layer, respectively.
+    """
+
+    def __init__(self, WIDTH=3):
+        self.WIDTH = WIDTH
+        self.SIZE = WIDTH ** 2
+        self.NUM_DIAGS = 2
+
+        W = WIDTH
+        self.lines = np.array(
+            [[i*W + j for j in range(W)] for i in range(W)] +
+            [[i*W + j for i in range(W)] for j in range(W)] +
+            [[(W+1) * i for i in range(W)],
+             [(W-1) + (W-1) * i for i in range(W)]]
+        )
+        # Placing player in square i adds player * powers[i] to a board key
+        self.powers = 3 ** np.arange(self.SIZE - 1, -1, -1, dtype=np.int64)
+
+        self.best_responses = {}
+        self.layer_stats = []
+
+
+    def build_best_responses(self, board=None, player=None):
+        """Compute best responses for all subgames of board, bottom-up.
+
+        Call with no arguments to build the entire best_responses dict.
+
+        player = 1 for X, -1 for O. This is the current player, i.e. the one
+        who gets the next move.
+        """
+
+        # Initialize
+        if board is None:
+            board = (0,) * self.SIZE
+            player = 1
+
+        self.layer_stats = []
+        layers = self.enumerate_layers(board, player)
+
+        # Work back from the last layer, whose boards are all finished games.
+        values = None
+        for k in reversed(range(len(layers))):
+            t0 = default_timer()
+            boards, keys = layers[k]
+            layer_player = player if k % 2 == 0 else -player
+            if values is None:
+                moves, values = self.resolve_layer(boards, keys, layer_player,
+                                                   None, None)
+            else:
+                moves, values = self.resolve_layer(boards, keys, layer_player,
+                                                   layers[k+1][1], values)
+            t1 = default_timer()
+
+            for board2, move, value in zip(boards.tolist(), moves.tolist(),
+                                           values.tolist()):
+                self.best_responses[tuple(board2)] = (
+                    None if move < 0 else move, value)
+
+            self.layer_stats[k]['backward_time'] = t1 - t0
+
+
+    def enumerate_layers(self, board, player):
+        """Return a list of (boards, keys) for each layer of boards reachable
+        from board, where player has the next move.
+
+        boards is an (N, SIZE) array and keys is the sorted array of their
+        board keys.
+        """
+        boards = np.array([board], dtype=np.int8)
+        layers = [(boards, batch.board_keys(boards))]
+        pieces = sum(1 for val in board if val != 0)
+
+        while True:
+            t0 = default_timer()
+            boards, keys = layers[-1]
+            over = self.outcomes(boards, player) != NOT_OVER
+            stats = {
+                'pieces': pieces + len(layers) - 1,
+                'boards': len(boards),
+                'terminal': int(over.sum()),
+                'nbytes': boards.nbytes + keys.nbytes,
+            }
+            self.layer_stats.append(stats)
+
+            boards = boards[~over]
+            if not len(boards):
+                stats['forward_time'] = default_timer() - t0
+                return layers
+
+            # Every move from every unfinished board, with duplicates removed.
+            children = []
+            for i in range(self.SIZE):
+                child = boards[boards[:, i] == 0]
+                child[:, i] = player
+                children.append(child)
+            children = np.concatenate(children)
+            keys, index = np.unique(batch.board_keys(children),
+                                    return_index=True)
+            layers.append((children[index], keys))
+
+            player = -1 * player
+            stats['forward_time'] = default_timer() - t0
+
+
+    def resolve_layer(self, boards, keys, player, child_keys, child_values):
+        """Return arrays (moves, values) of best responses to each board.
+
+        child_keys and child_values are the keys and values of the next layer.
+        A move of -1 means there is nowhere left to go.
+        """
+        values = self.outcomes(boards, player)
+        moves = np.full(len(boards), -1, dtype=np.int8)
+        live = values == NOT_OVER
+        if not live.any():
+            return moves, values
+
+        # Value of each move to player, or -2 where the square is taken.
+        move_values = np.full((len(boards), self.SIZE), -2, dtype=np.int8)
+        for i in range(self.SIZE):
+            sel = live & (boards[:, i] == 0)
+            index = np.searchsorted(child_keys, keys[sel] + player * self.powers[i])
+            move_values[sel, i] = -child_values[index]
+
+        # argmax picks the first of the best moves, as in tictactoe01.
+        moves[live] = move_values[live].argmax(axis=1)
+        values[live] = move_values[live].max(axis=1)
+        return moves, values
+
+
+    def outcomes(self, boards, player):
+        """Evaluate an (N, SIZE) array of boards to determine if there is a winner.
+
+        Returns an array holding 1 where player wins, 0 for a draw, -1 where
+        player loses, and NOT_OVER where no winner is yet determined.
+        """
+        sums = boards[:, self.lines].sum(axis=2)
+        x_wins = (sums == self.WIDTH).any(axis=1)
+        o_wins = (sums == -self.WIDTH).any(axis=1)
+        full = (boards != 0).all(axis=1)
+
+        values = np.full(len(boards), NOT_OVER, dtype=np.int8)
+        values[full] = 0
+        values[o_wins] = -player
+        values[x_wins] = player
+        return values
+
+
+    def check_win(self, board, player):
+        """Evaluate the current board to determine if there is a winner.
+
+        Returns 1 if player wins, 0 if draw, -1 if loses, and None if no winner
+        is yet determined.
+        """
+        value = self.outcomes(np.array([board]), player)[0]
+        return None if value == NOT_OVER else int(value)
+
+
+
+# Some sample tests, not very high coverage.
+class TestTicTacToe():
+
+    def test(self):
+        print "\n---RUNNING TESTS---\n"
+
+        self.test_check_win()
+        self.test_build_best_responses()
+        self.test_matches_recursive_solver()
+
+        print "\n---ALL TESTS PASS---\n"
+
+
+    def test_check_win(self):
+
+        game = TicTacToe()
+
+        assert game.check_win((0,0,0, 0,0,0, 0,0,0), -1) is None
+        assert game.check_win((1,1,-1, 0,0,0, 0,0,0), -1) is None
+
+        assert game.check_win((1,-1,-1, 0,1,0, 0,0,1), -1) == -1
+        assert game.check_win((1,1,1, 0,0,0, -1,-1,0), -1) == -1
+
+        assert game.check_win((1,1,-1, 1,0,-1, 0,0,-1), 1) == -1
+        assert game.check_win((1,1,1, -1,0,-1, 0,0,-1), 1) == 1
+
+        assert game.check_win((1,1,-1, -1,-1,1, 1,1,-1), 1) == 0
+
+        print '\t* test_check_win passes'
+
+
+    def test_build_best_responses(self):
+
+        game = TicTacToe()
+        game.build_best_responses()
+
+        assert game.best_responses[(1,-1,1, -1,1,-1, 1,-1,1)] == (None, -1)
+        assert game.best_responses[(1,1,-1, -1,-1,1, 1,1,-1)] == (None, 0)
+        assert game.best_responses[(1,-1,1, -1,1,1, -1,-1,0)] == (8,1)
+        assert game.best_responses[(1,1,0, 0,-1,-1, 0,0,0)] == (2, 1)
+        assert game.best_responses[(0,0,0, 0,0,0, 0,0,0)][1] == 0
+
+        # There are 5478 possible board states.
+        assert len(game.best_responses) == 5478
+
+        # One layer for each number of pieces, 0 to 9.
+        assert [s['pieces'] for s in game.layer_stats] == range(10)
+        assert sum(s['boards'] for s in game.layer_stats) == 5478
+        assert game.layer_stats[9]['terminal'] == game.layer_stats[9]['boards']
+        # A board takes SIZE bytes, and its key 8 more.
+        assert all(s['nbytes'] == s['boards'] * (9 + 8) for s in game.layer_stats)
+
+        # Starting from a board part way through a game.
+        game = TicTacToe()
+        game.build_best_responses((1,1,0, 0,-1,-1, 0,0,0), 1)
+        assert game.best_responses[(1,1,0, 0,-1,-1, 0,0,0)] == (2, 1)
+        assert game.best_responses[(1,1,1, 0,-1,-1, 0,0,0)] == (None, -1)
+
+        print '\t* test_build_best_responses passes'
+
+
+    def test_matches_recursive_solver(self):
+
+        import tictactoe01
+
+        game = TicTacToe()
+        game.build_best_responses()
+        game01 = tictactoe01.TicTacToe()
+        game01.build_best_responses()
+
+        assert game.best_responses == game01.best_responses
+
+        print '\t* test_matches_recursive_solver passes'
+
+
+
+def print_layer_stats(layer_stats):
+    "Print the per-layer timings and memory from a solve."
+    print "pieces    boards  terminal  forward  backward     bytes"
+    for s in layer_stats:
+        print "%6d %9d %9d %8.4f %9.4f %9d" % (
+            s['pieces'], s['boards'], s['terminal'],
+            s['forward_time'], s['backward_time'], s['nbytes'])
+
+
+
+if __name__ == '__main__':
+
+    tests = TestTicTacToe()
+    tests.test()
+
+    print "Timing for WIDTH = 3..."
+    tictactoe = TicTacToe(3)
+    funtime(tictactoe.build_best_responses)
+    print "Size of best_responses:", len(tictactoe.best_responses)
+    print_layer_stats(tictactoe.layer_stats)
+
+    # print "\n"
+
+    # print "Timing for WIDTH = 4..."
+    # tictactoe = TicTacToe(4)
+    # funtime(tictactoe.build_best_responses)
+    # print "Size of best_responses:", len(tictactoe.best_responses)
+    # print_layer_stats(tictactoe.layer_stats)
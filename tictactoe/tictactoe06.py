@@ -0,0 +1,523 @@
+# Find the best response to any tic-tac-toe board configuration.
+# taking a memoized approach.
+
+# This could be used as a starting point for a full game with the ability
+# to play tic-tac-toe against an intelligent computer.
+# It also serves as an example for how to find brute-force solutions for
+# more complex games where straightforward logic would not be possible.
+
+# check_win looks at every row, column and diagonal of the board, but after
+# a move only the lines through the square that was just filled can have
+# changed. So this version keeps a single board list, and makes and unmakes
+# moves on it as it searches, keeping a running sum of each line (+1 for
+# each X, -1 for each O) and a count of the empty squares. A move wins if
+# it brings the sum of one of its lines to +WIDTH or -WIDTH, and the game is
+# a draw when the count of empty squares reaches 0. That makes the cost of
+# detecting the end of the game independent of the size of the board.
+
+# The search otherwise works just as in tictactoe01, and finds the same
+# best_responses.
+
+# The table is not keyed by board tuples either, since building a tuple of
+# the board and hashing it at every node would undo much of the saving.
+# Instead each board has a Zobrist key: a random 64-bit number is drawn for
+# each square and player, and the key of a board is the XOR of the numbers
+# for the pieces on it. Making or unmaking a move is then a single XOR of
+# the running key. Different boards could in principle share a key; with
+# verify=True, the board behind every key is kept and checked on each hit.
+
+# With canonical=True, equivalent boards (rotations and reflections) share
+# one entry in the table, as in tictactoe03. Rather than computing all 8
+# symmetries of the board at every node, 8 Zobrist keys are kept up to date:
+# key t is the key the board would have after symmetry t. Placing a piece in
+# square i changes key t by the number for the square that i is sent to by
+# symmetry t, so a move costs 8 XORs, and the smallest of the 8 keys is the
+# same for every board in a class.
+
+
+import collections
+import random
+from operator import xor
+
+import tictactoe03
+from benchmark import funtime
+
+
+
+class TicTacToe():
+    """Implements the basic components of a tic-tac-toe solver.
+
+    table is a dictionary where:
+        * each key is the Zobrist key of a board (see hash_board).
+        * each value is a tuple, (move, value), exactly as in tictactoe01:
+            * move: an int in range(SIZE) indicating where the player should
+                move, or None if there is nowhere left to go.
+            * value: the value of that move to the player who makes it.
+                value = +1/-1/0 for a win/loss/draw, respectively.
+
+    best_responses is a view of table that is keyed by flat board tuples,
+    e.g. (-1, 0, 0, 1, 1, 0, 0, 0, 0), like the best_responses dict of
+    tictactoe01. It can only be iterated over if verify is True.
+
+    If verify is True, boards maps each key in table to its board tuple,
+    and every hit in table is checked against the board being searched.
+
+    If canonical is True, table is keyed by the smallest of the 8 keys in
+    sym_keys, and the move stored is a move on the board with that key.
+    best_responses, or lookup, maps moves back onto the board asked about.
+
+    While solving, the position being searched is held in
+        * board: a list of the SIZE squares.
+        * line_sums: the sum of the squares of each line in lines.
+        * empties: the number of empty squares.
+        * key: the Zobrist key of board.
+        * sym_keys: the Zobrist keys of the 8 symmetries of board, if canonical.
+    """
+
+    def __init__(self, WIDTH=3, verify=False, seed=0, canonical=False):
+        self.WIDTH = WIDTH
+        self.SIZE = WIDTH ** 2
+        self.NUM_DIAGS = 2
+
+        W = WIDTH
+        self.lines = ([[i*W + j for j in range(W)] for i in range(W)] +
+                      [[i*W + j for i in range(W)] for j in range(W)] +
+                      [[(W+1) * i for i in range(W)],
+                       [(W-1) + (W-1) * i for i in range(W)]]
+        )
+        # lines_through[i] lists the lines (by index) that contain square i
+        self.lines_through = [[l for l, line in enumerate(self.lines) if i in line]
+                              for i in range(self.SIZE)]
+
+        # zobrist[player][i] is the random number for player's piece in square i
+        rng = random.Random(seed)
+        self.zobrist = dict((player, [rng.getrandbits(64) for _ in range(self.SIZE)])
+                            for player in [1, -1])
+
+        # sym_dest[t][i] is the square that symmetry t sends square i to,
+        # and sym_source[t] is the inverse. The 8 symmetries are those of
+        # tictactoe03, in the same order.
+        game03 = tictactoe03.TicTacToe(WIDTH)
+        self.sym_dest = game03.inverse_perms
+        self.sym_source = game03.symmetry_perms
+
+        # sym_zobrist[player][i][t] is what placing player in square i
+        # XORs into sym_keys[t].
+        self.sym_zobrist = dict(
+            (player, [[self.zobrist[player][dest[i]] for dest in self.sym_dest]
+                      for i in range(self.SIZE)])
+            for player in [1, -1])
+
+        self.canonical = canonical
+        self.table = {}
+        self.verify = verify
+        self.boards = {}
+        self.best_responses = BoardTable(self)
+
+        self.set_board((0,) * self.SIZE)
+
+
+    def set_board(self, board):
+        "Make board the position being searched."
+        self.board = list(board)
+        self.line_sums = [sum(board[i] for i in line) for line in self.lines]
+        self.empties = self.board.count(0)
+        self.key = self.hash_board(board)
+        self.sym_keys = self.hash_symmetries(board)
+
+
+    def hash_board(self, board):
+        "Return the Zobrist key of board, from scratch."
+        key = 0
+        for i, val in enumerate(board):
+            if val != 0:
+                key ^= self.zobrist[val][i]
+        return key
+
+    def hash_symmetries(self, board):
+        "Return the Zobrist keys of the 8 symmetries of board, from scratch."
+        sym_keys = [0] * len(self.sym_dest)
+        for i, val in enumerate(board):
+            if val != 0:
+                sym_keys = map(xor, sym_keys, self.sym_zobrist[val][i])
+        return sym_keys
+
+    def table_key(self, board):
+        "Return the key of board in table."
+        if self.canonical:
+            return min(self.hash_symmetries(board))
+        return self.hash_board(board)
+
+
+    def do_move(self, i, player):
+        """Put player's piece in square i. Returns True if this wins the game.
+
+        Only the lines through square i are updated or checked.
+        """
+        self.board[i] = player
+        self.empties -= 1
+        self.key ^= self.zobrist[player][i]
+        if self.canonical:
+            self.sym_keys = map(xor, self.sym_keys, self.sym_zobrist[player][i])
+        win = False
+        line_sums = self.line_sums
+        for l in self.lines_through[i]:
+            line_sums[l] += player
+            if line_sums[l] == player * self.WIDTH:
+                win = True
+        return win
+
+
+    def undo_move(self, i, player):
+        "Take player's piece back out of square i."
+        self.board[i] = 0
+        self.empties += 1
+        self.key ^= self.zobrist[player][i]
+        if self.canonical:
+            self.sym_keys = map(xor, self.sym_keys, self.sym_zobrist[player][i])
+        line_sums = self.line_sums
+        for l in self.lines_through[i]:
+            line_sums[l] -= player
+
+
+    def build_best_responses(self, board=None, player=None):
+        """Compute best responses for all subgames of current board.
+
+        Call with no arguments to build the entire best_responses dict.
+
+        player = 1 for X, -1 for O. This is the current player, i.e. the one
+        who gets the next move.
+        """
+
+        # Initialize
+        if board is None:
+            board = (0,) * self.SIZE
+            player = 1
+
+        # This is the only full check of the board.
+        current_outcome = self.check_win(board, player)
+        self.set_board(board)
+        if current_outcome is not None:
+            self.add(self.current_key(), (None, current_outcome))
+            return
+
+        self.solve(player)
+
+
+    def solve(self, player):
+        """Recursively add the current board and all boards that could follow
+        it to best_responses, assuming the game is not over.
+
+        Returns the value of the current board to player.
+        """
+        board = self.board
+        key = min(self.sym_keys) if self.canonical else self.key
+        if key in self.table:
+            if self.verify:
+                self.check_key(key)
+            return self.table[key][1]
+
+        best_value = -2
+        for i in range(self.SIZE):
+            if board[i] == 0:
+                if self.do_move(i, player):
+                    # The game is won, and the other player has nowhere to go.
+                    value = 1
+                    self.add(self.current_key(), (None, -1))
+                elif self.empties == 0:
+                    value = 0
+                    self.add(self.current_key(), (None, 0))
+                else:
+                    value = -1 * self.solve(-1 * player)
+                self.undo_move(i, player)
+
+                if value > best_value:
+                    best_value, best_move = value, i
+
+        if self.canonical:
+            # Store the move as a move on the board with the smallest key.
+            best_move = self.sym_dest[self.sym_keys.index(key)][best_move]
+        self.add(key, (best_move, best_value))
+        return best_value
+
+
+    def current_key(self):
+        "Return the key of the current board in table."
+        return min(self.sym_keys) if self.canonical else self.key
+
+    def current_key_board(self):
+        "Return the current board as a tuple, as seen by its key in table."
+        if not self.canonical:
+            return tuple(self.board)
+        source = self.sym_source[self.sym_keys.index(min(self.sym_keys))]
+        return tuple([self.board[j] for j in source])
+
+
+    def add(self, key, response):
+        "Add the best response to the current board to table, if it is new."
+        if key in self.table:
+            if self.verify:
+                self.check_key(key)
+            return
+        self.table[key] = response
+        if self.verify:
+            self.boards[key] = self.current_key_board()
+
+
+    def check_key(self, key):
+        "Raise RuntimeError if key belongs to a board other than the current one."
+        board = self.current_key_board()
+        if self.boards[key] != board:
+            raise RuntimeError("Zobrist key %x is shared by %s and %s"
+                               % (key, self.boards[key], board))
+
+
+    def lookup(self, board):
+        """Return the best response (move, value) to board.
+
+        In canonical mode, the move stored for board's key is mapped back to
+        the corresponding square of board.
+        """
+        if not self.canonical:
+            return self.table[self.hash_board(board)]
+
+        sym_keys = self.hash_symmetries(board)
+        key = min(sym_keys)
+        move, value = self.table[key]
+        if move is not None:
+            move = self.sym_source[sym_keys.index(key)][move]
+        return (move, value)
+
+
+    def check_win(self, board, player):
+        """Evaluate the current board to determine if there is a winner.
+
+        Returns 1 if player wins, 0 if draw, -1 if loses, and None if no winner
+        is yet determined.
+        """
+        for line in self.lines:
+            winner = sum(board[i] for i in line)
+            if winner == self.WIDTH or winner == -self.WIDTH:
+                winner /= self.WIDTH
+                return winner * player
+
+        if 0 not in board:
+            return 0 # draw
+        else: return None # game not over yet
+
+
+class BoardTable(collections.Mapping):
+    """Read-only view of a Zobrist-keyed table, keyed by flat board tuples.
+
+    Boards are only hashed when they are looked up, never while solving.
+    As a collections.Mapping, it has all the read methods of a dict.
+    """
+
+    def __init__(self, game):
+        self.game = game
+
+    def __getitem__(self, board):
+        return self.game.lookup(board)
+
+    def __contains__(self, board):
+        return self.game.table_key(board) in self.game.table
+
+    def __len__(self):
+        return len(self.game.table)
+
+    def __iter__(self):
+        if not self.game.verify:
+            raise TypeError("boards are only kept with verify=True")
+        return iter(self.game.boards.itervalues())
+
+    def get(self, board, default=None):
+        if board in self:
+            return self.game.lookup(board)
+        return default
+
+    def items(self):
+        return [(board, self[board]) for board in self]
+
+
+
+# Some sample tests, not very high coverage.
+class TestTicTacToe():
+
+    def test(self):
+        print "\n---RUNNING TESTS---\n"
+
+        self.test_check_win()
+        self.test_do_move()
+        self.test_zobrist()
+        self.test_symmetric_zobrist()
+        self.test_build_best_responses()
+        self.test_matches_tuple_engine()
+
+        print "\n---ALL TESTS PASS---\n"
+
+
+    def test_check_win(self):
+
+        game = TicTacToe()
+
+        assert game.check_win((0,0,0, 0,0,0, 0,0,0), -1) is None
+        assert game.check_win((1,1,-1, 0,0,0, 0,0,0), -1) is None
+
+        assert game.check_win((1,-1,-1, 0,1,0, 0,0,1), -1) == -1
+        assert game.check_win((1,1,1, 0,0,0, -1,-1,0), -1) == -1
+
+        assert game.check_win((1,1,-1, 1,0,-1, 0,0,-1), 1) == -1
+        assert game.check_win((1,1,1, -1,0,-1, 0,0,-1), 1) == 1
+
+        assert game.check_win((1,1,-1, -1,-1,1, 1,1,-1), 1) == 0
+
+        print '\t* test_check_win passes'
+
+
+    def test_do_move(self):
+
+        game = TicTacToe()
+        board = (1,-1,0, 0,1,0, -1,0,0)
+        game.set_board(board)
+        line_sums = list(game.line_sums)
+
+        assert not game.do_move(2, 1)
+        assert not game.do_move(3, -1)
+        assert game.do_move(8, 1) # main diagonal
+        assert game.empties == 2
+        assert game.board == [1,-1,1, -1,1,0, -1,0,1]
+
+        game.undo_move(8, 1)
+        game.undo_move(3, -1)
+        game.undo_move(2, 1)
+        assert tuple(game.board) == board
+        assert game.line_sums == line_sums
+        assert game.empties == 5
+
+        print '\t* test_do_move passes'
+
+
+    def test_zobrist(self):
+
+        game = TicTacToe()
+        board = (1,-1,0, 0,1,0, -1,0,0)
+        game.set_board(board)
+        key = game.key
+        assert key == game.hash_board(board)
+
+        # The running key always matches the key of the board.
+        game.do_move(2, 1)
+        game.do_move(3, -1)
+        assert game.key == game.hash_board(game.board)
+        game.undo_move(3, -1)
+        game.undo_move(2, 1)
+        assert game.key == key
+
+        # Forced collision between two boards
+        game = TicTacToe(verify=True)
+        game.zobrist[1][1] = game.zobrist[1][0]
+        try:
+            game.build_best_responses()
+            assert False
+        except RuntimeError:
+            pass
+
+        print '\t* test_zobrist passes'
+
+
+    def test_symmetric_zobrist(self):
+
+        game = TicTacToe(canonical=True)
+        game03 = tictactoe03.TicTacToe()
+        a = (1,-1,0, 0,1,0, -1,0,0)
+
+        # Key t is the key of the tth symmetry of the board.
+        assert (game.hash_symmetries(a) ==
+                [game.hash_board(a2) for a2 in game03.symmetries(a)])
+
+        # ...and stays so as moves are made.
+        game.set_board(a)
+        game.do_move(2, 1)
+        a2 = tuple(game.board)
+        assert (game.sym_keys ==
+                [game.hash_board(a3) for a3 in game03.symmetries(a2)])
+        game.undo_move(2, 1)
+        assert game.sym_keys == game.hash_symmetries(a)
+
+        # Equivalent boards have the same key in table.
+        for a2 in game03.symmetries(a):
+            assert game.table_key(a2) == game.table_key(a)
+
+        print '\t* test_symmetric_zobrist passes'
+
+
+    def test_build_best_responses(self):
+
+        game = TicTacToe()
+        game.build_best_responses()
+
+        assert game.best_responses[(1,-1,1, -1,1,-1, 1,-1,1)] == (None, -1)
+        assert game.best_responses[(1,1,-1, -1,-1,1, 1,1,-1)] == (None, 0)
+        assert game.best_responses[(1,-1,1, -1,1,1, -1,-1,0)] == (8,1)
+        assert game.best_responses[(1,1,0, 0,-1,-1, 0,0,0)] == (2, 1)
+        assert game.best_responses[(1,0,0, 1,-1,-1, 0,0,0)][1] == 1
+
+        # There are 5478 possible board states.
+        assert len(game.best_responses) == 5478
+
+        print '\t* test_build_best_responses passes'
+
+
+    def test_matches_tuple_engine(self):
+
+        import tictactoe01
+
+        game01 = tictactoe01.TicTacToe()
+        game01.build_best_responses()
+
+        game = TicTacToe()
+        game.build_best_responses()
+        assert len(game.best_responses) == len(game01.best_responses)
+        for board, response in game01.best_responses.iteritems():
+            assert game.best_responses[board] == response
+
+        game = TicTacToe(verify=True)
+        game.build_best_responses()
+        assert dict(game.best_responses.items()) == game01.best_responses
+        assert game.best_responses == game01.best_responses
+
+        # In canonical mode, only 765 boards are stored, and moves are
+        # equally good, but may differ.
+        for verify in [False, True]:
+            game = TicTacToe(verify=verify, canonical=True)
+            game.build_best_responses()
+            assert len(game.best_responses) == 765
+            for board, (move, value) in game01.best_responses.iteritems():
+                move2, value2 = game.best_responses[board]
+                assert value2 == value
+                if move is None:
+                    assert move2 is None
+                else:
+                    player = 1 if board.count(1) == board.count(-1) else -1
+                    board2 = board[:move2] + (player,) + board[move2+1:]
+                    assert board[move2] == 0
+                    assert -game01.best_responses[board2][1] == value
+
+        print '\t* test_matches_tuple_engine passes'
+
+
+
+if __name__ == '__main__':
+
+    tests = TestTicTacToe()
+    tests.test()
+
+    print "Timing for WIDTH = 3..."
+    tictactoe = TicTacToe(3)
+    funtime(tictactoe.build_best_responses)
+    print "Size of best_responses:", len(tictactoe.best_responses)
+
+    print "Timing for WIDTH = 3, canonical boards only..."
+    tictactoe = TicTacToe(3, canonical=True)
+    funtime(tictactoe.build_best_responses)
+    print "Size of best_responses:", len(tictactoe.best_responses)